@@ -0,0 +1,12 @@
+"""
+The service's modules import each other by bare name (`import config`), as
+when uvicorn runs with `--app-dir app`; putting this directory on sys.path
+keeps `uvicorn app.app:app` and `import app.app` from the repo root working too.
+"""
+
+import os
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
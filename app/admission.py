@@ -0,0 +1,134 @@
+"""
+🚦 Latency-driven admission control (CoDel-style load shedding)
+✅ Bounded concurrency + bounded wait queue per lane (interactive / bulk)
+✅ Sheds on measured queueing delay, not queue length alone
+✅ Fast 503 + Retry-After instead of every request timing out together
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Tuple
+
+
+class Overloaded(Exception):
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"{lane} lane overloaded")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class AdmissionLane:
+    """
+    CoDel applied to request admission: once the minimum queueing delay has
+    stayed above `target_delay` for a whole `interval`, the lane enters the
+    dropping state and sheds queued requests that waited longer than the
+    target, until a request gets through under target again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        target_delay: float = 0.05,
+        interval: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.target_delay = target_delay
+        self.interval = interval
+        self._clock = clock
+        self._active = 0
+        self._waiters: Deque[Tuple[float, "asyncio.Future[bool]"]] = deque()
+        self._first_above = 0.0
+        self._dropping = False
+        self._service_ewma = 0.0
+        self.admitted = 0
+        self.shed_on_arrival = 0
+        self.shed_delay = 0
+
+    def _observe_sojourn(self, sojourn: float, now: float) -> None:
+        if sojourn < self.target_delay:
+            self._first_above = 0.0
+            self._dropping = False
+        elif self._first_above == 0.0:
+            self._first_above = now + self.interval
+        elif now >= self._first_above:
+            self._dropping = True
+
+    def retry_after(self) -> int:
+        backlog = len(self._waiters) + self._active
+        estimate = self._service_ewma * backlog / max(self.max_concurrency, 1)
+        return max(1, math.ceil(estimate))
+
+    async def _acquire(self) -> None:
+        now = self._clock()
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            self._observe_sojourn(0.0, now)
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue or self._dropping:
+            self.shed_on_arrival += 1
+            raise Overloaded(self.name, self.retry_after())
+
+        fut: "asyncio.Future[bool]" = asyncio.get_running_loop().create_future()
+        entry = (now, fut)
+        self._waiters.append(entry)
+        try:
+            admitted = await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled() and fut.result():
+                self._release()  # slot was handed over just as we were cancelled
+            else:
+                try:
+                    self._waiters.remove(entry)
+                except ValueError:
+                    pass
+            raise
+        if not admitted:
+            self.shed_delay += 1
+            raise Overloaded(self.name, self.retry_after())
+        self.admitted += 1
+
+    def _release(self) -> None:
+        now = self._clock()
+        while self._waiters:
+            enqueued_at, fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            sojourn = now - enqueued_at
+            self._observe_sojourn(sojourn, now)
+            if self._dropping and sojourn > self.target_delay:
+                fut.set_result(False)
+                continue
+            fut.set_result(True)  # slot passes straight to the waiter
+            return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self._acquire()
+        started = self._clock()
+        try:
+            yield
+        finally:
+            elapsed = self._clock() - started
+            self._service_ewma = elapsed if not self._service_ewma else 0.8 * self._service_ewma + 0.2 * elapsed
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "queued": len(self._waiters),
+            "dropping": self._dropping,
+            "admitted": self.admitted,
+            "shed_on_arrival": self.shed_on_arrival,
+            "shed_delay": self.shed_delay,
+            "service_ewma_ms": round(self._service_ewma * 1000, 3),
+        }
@@ -1,20 +1,110 @@
-from fastapi import FastAPI, HTTPException
+from startup import StartupTimeline
+timeline = StartupTimeline()
+
+from fastapi import FastAPI, HTTPException, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+import hashlib
+import json
 import logging
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from starlette.background import BackgroundTask
+import config
+from admission import AdmissionLane, Overloaded
+from ratelimit import MemoryBackend, RateLimiter, RateLimitMiddleware, client_identity
+from idempotency import IdempotencyConflict, IdempotencyStore
+from body_guard import BodyGuard, BodyGuardMiddleware, BodyRule
+from result_cache import ResultCache, content_key, normalize_transcript
+from singleflight import SingleFlight
+from fastparse import TranscriptParseError, parse_transcript
+from schemas import JobRequest, TranscriptInput
+from soap_encoder import SOAPJSONResponse, encode_generic, encode_soap
+from static_assets import StaticAsset, etag_matches
+from warmup import run_warmup
 try:
     from soap_generator import SOAPGenerator
 except ImportError:
     SOAPGenerator = None
+# Optional subsystems are imported further down, only when enabled
+timeline.mark("imports")
+
+# Readiness: flips only after warmup, and back off again on shutdown
+ready = False
+startup_report: Dict[str, Any] = {}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global ready
+    timeline.mark("lifespan")
+    if soap_gen:
+        startup_report["warmup"] = run_warmup(soap_gen)
+        timeline.mark("warmup")
+    if job_workers:
+        job_workers.start()
+        timeline.mark("job_workers")
+    if model_soap and config.MODEL_PRIME:
+        # Not fatal: the first real request pays the load instead
+        startup_report["model_prime"] = await model_soap.prime(config.MODEL_PRIME_TIMEOUT)
+        timeline.mark("model_prime")
+    timeline.mark("ready")
+    startup_report["timeline"] = timeline.report()
+    logger.info("Startup timeline: %s", startup_report)
+    ready = True
+    yield
+    ready = False
+    if job_workers:
+        await job_workers.stop()
+    if model_soap:
+        await model_soap.backend.aclose()
+        if hedge_backend:
+            await hedge_backend.aclose()
 
 # FIX 1: app FIRST
-app = FastAPI(title="🏥 Clinical SOAP AI")
+app = FastAPI(title="🏥 Clinical SOAP AI", lifespan=lifespan)
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Body limits are enforced while bytes arrive, before anything is parsed
+_TRANSCRIPT_TYPES = frozenset({"application/json", "text/plain"})
+_JSON_ONLY = frozenset({"application/json"})
+body_guard = BodyGuard(
+    {
+        "/generate-soap": BodyRule(config.BODY_MAX_BYTES, _TRANSCRIPT_TYPES),
+        "/generate-soap/stream": BodyRule(config.BODY_MAX_BYTES, _TRANSCRIPT_TYPES),
+        "/generate-soap/validated": BodyRule(config.BODY_MAX_BYTES, _JSON_ONLY),
+        "/jobs": BodyRule(config.JOBS_BODY_MAX_BYTES, _JSON_ONLY),
+    },
+    chunk_timeout=config.BODY_CHUNK_TIMEOUT,
+    min_rate=config.BODY_MIN_RATE,
+    grace_seconds=config.BODY_GRACE_SECONDS,
+)
+app.add_middleware(BodyGuardMiddleware, guard=body_guard)
+
+def _rate_limit_backend():
+    if config.RATE_LIMIT_BACKEND.startswith("sqlite:"):
+        from ratelimit import SQLiteBackend
+        return SQLiteBackend(config.RATE_LIMIT_BACKEND[len("sqlite:"):])
+    return MemoryBackend(max_entries=config.RATE_LIMIT_MAX_CLIENTS)
+
+rate_limiter = RateLimiter(
+    _rate_limit_backend(),
+    rate=config.RATE_LIMIT_RATE,
+    burst=config.RATE_LIMIT_BURST,
+    paths=("/generate-soap", "/generate-soap/stream", "/generate-soap/validated", "/jobs"),
+    bytes_per_token=config.RATE_LIMIT_BYTES_PER_TOKEN,
+    trust_forwarded=config.RATE_LIMIT_TRUST_FORWARDED,
+    api_keys=config.RATE_LIMIT_API_KEYS,
+) if config.RATE_LIMIT_ENABLED else None
+
+# Added before CORS so it sits inside it: 429s still carry CORS headers
+if rate_limiter:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, guard=body_guard)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -23,81 +113,458 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+timeline.mark("app")
+
 # FIX 2: Initialize AFTER app definition
 soap_gen = SOAPGenerator() if SOAPGenerator else None
 
-class Transcript(BaseModel):
-    transcript: str
+# Optional model backend (Ollama / OpenAI-compatible); httpx is only imported when set
+model_soap = None
+hedge_backend = None
+FALLBACK_PATHS: frozenset = frozenset()
+if config.MODEL_BACKEND and soap_gen:
+    from microbatch import MicroBatcher
+    from compaction import TranscriptCompactor
+    from model_backend import create_backend
+    from model_cache import ModelOutputCache
+    from model_generator import FALLBACK_PATHS, ModelSOAPGenerator
+    from resilience import CircuitBreaker, HedgedCompletion
+    _backend_options = (
+        {"batch_prompts": config.MODEL_BATCH_PROMPTS, "prompt_cache_key": config.MODEL_PROMPT_CACHE_KEY}
+        if config.MODEL_BACKEND == "openai"
+        else {"keep_alive": config.MODEL_KEEP_ALIVE}
+    )
+
+    def _model_backend(url: str):
+        return create_backend(
+            config.MODEL_BACKEND,
+            url,
+            config.MODEL_NAME,
+            max_concurrency=config.MODEL_MAX_CONCURRENCY,
+            timeout=config.MODEL_TIMEOUT,
+            keepalive_expiry=config.MODEL_KEEPALIVE_EXPIRY,
+            options={"temperature": config.MODEL_TEMPERATURE},
+            api_key=config.MODEL_API_KEY,
+            stream=config.MODEL_STREAM,
+            **_backend_options,
+        )
+
+    model_backend = _model_backend(config.MODEL_URL)
+    model_batcher = MicroBatcher(
+        model_backend,
+        max_batch=config.MODEL_BATCH_MAX_SIZE,
+        max_wait=config.MODEL_BATCH_MAX_WAIT_MS / 1000,
+    ) if config.MODEL_BATCHING else None
+    hedge_backend = _model_backend(config.MODEL_HEDGE_URL) if config.MODEL_HEDGE_URL else None
+    model_soap = ModelSOAPGenerator(
+        model_backend,
+        soap_gen,
+        mode=config.MODEL_MODE,
+        batcher=model_batcher,
+        breaker=CircuitBreaker(
+            window=config.MODEL_BREAKER_WINDOW,
+            min_calls=config.MODEL_BREAKER_MIN_CALLS,
+            failure_rate=config.MODEL_BREAKER_FAILURE_RATE,
+            slow_call=config.MODEL_BREAKER_SLOW_CALL,
+            slow_call_rate=config.MODEL_BREAKER_SLOW_CALL_RATE,
+            open_seconds=config.MODEL_BREAKER_OPEN_SECONDS,
+            half_open_probes=config.MODEL_BREAKER_HALF_OPEN_PROBES,
+        ) if config.MODEL_BREAKER else None,
+        hedger=HedgedCompletion(
+            model_batcher.complete if model_batcher else model_backend.complete,
+            hedge_backend.complete,
+            min_delay=config.MODEL_HEDGE_MIN_DELAY_MS / 1000,
+        ) if hedge_backend else None,
+        cache=ModelOutputCache(
+            config.MODEL_CACHE_DB, max_bytes=config.MODEL_CACHE_MAX_BYTES
+        ) if config.MODEL_CACHE_DB else None,
+        compactor=TranscriptCompactor(config.MODEL_PROMPT_TOKEN_BUDGET) if config.MODEL_COMPACT else None,
+        chunk_tokens=config.MODEL_CHUNK_TOKENS,
+        chunk_overlap=config.MODEL_CHUNK_OVERLAP_TURNS,
+        reprompts=config.MODEL_REPROMPTS,
+    )
+
+result_cache = ResultCache(
+    max_entries=config.RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=config.RESULT_CACHE_MAX_BYTES,
+    ttl_seconds=config.RESULT_CACHE_TTL_SECONDS,
+) if config.RESULT_CACHE_ENABLED else None
+
+single_flight = SingleFlight() if config.SINGLE_FLIGHT_ENABLED else None
+
+idempotency_store = IdempotencyStore(
+    max_entries=config.IDEMPOTENCY_MAX_ENTRIES,
+    max_bytes=config.IDEMPOTENCY_MAX_BYTES,
+    ttl_seconds=config.IDEMPOTENCY_TTL_SECONDS,
+) if config.IDEMPOTENCY_ENABLED else None
+
+# Admission control: interactive requests and bulk work never share a queue
+interactive_lane = AdmissionLane(
+    "interactive",
+    max_concurrency=config.INTERACTIVE_MAX_CONCURRENCY,
+    max_queue=config.INTERACTIVE_MAX_QUEUE,
+    target_delay=config.INTERACTIVE_TARGET_DELAY,
+    interval=config.INTERACTIVE_INTERVAL,
+)
+bulk_lane = AdmissionLane(
+    "bulk",
+    max_concurrency=config.BULK_MAX_CONCURRENCY,
+    max_queue=config.BULK_MAX_QUEUE,
+    target_delay=config.BULK_TARGET_DELAY,
+    interval=config.BULK_INTERVAL,
+)
+
+def _overloaded_detail(exc: Overloaded) -> str:
+    return f"Server busy ({exc.lane}), retry shortly"
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": _overloaded_detail(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# Frontend is read and gzipped once, here, never per request
+FRONTEND = StaticAsset(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "index.html"),
+    media_type="text/html; charset=utf-8",
+    max_age=config.STATIC_MAX_AGE_SECONDS,
+)
 
-@app.post("/generate-soap")
-async def generate(request: Transcript):
+def _build_soap(transcript: str) -> dict:
     if soap_gen:
-        soap = soap_gen.generate(request.transcript)
+        return soap_gen.generate(transcript)
+    # Emergency fallback
+    t = transcript.lower()
+    return {
+        "subjective": {"chief_complaint": "Chest pain" if "chest" in t else "Evaluation", "hpi": transcript[:200]},
+        "objective": {"vitals": "Stable", "exam": "Normal", "labs": "Pending"},
+        "assessment": ["Clinical evaluation"],
+        "plan": {"medications": [], "labs": [], "follow_up": "PRN"},
+        "visit_summary": "Documentation complete"
+    }
+
+async def soap_sections(transcript: str) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Note sections, each yielded as soon as it is known: from the result cache,
+    from the model's streamed answer, or from the rule engine's stages.
+    """
+    if model_soap is not None:
+        key = soap_key(transcript)
+        body = result_cache.get(key) if result_cache is not None else None
+        if body is not None:
+            for section in json.loads(body).items():
+                yield section
+            return
+
+        def served(note: Dict[str, Any], path: str) -> None:
+            if result_cache is not None and path not in FALLBACK_PATHS:
+                result_cache.put(key, encode_soap(note))
+
+        async for section in model_soap.iter_sections(transcript, served):
+            yield section
+    elif soap_gen:
+        for section in soap_gen.iter_sections(transcript):
+            yield section
     else:
-        # Emergency fallback
-        t = request.transcript.lower()
-        soap = {
-            "subjective": {"chief_complaint": "Chest pain" if "chest" in t else "Evaluation", "hpi": request.transcript[:200]},
-            "objective": {"vitals": "Stable", "exam": "Normal", "labs": "Pending"},
-            "assessment": ["Clinical evaluation"],
-            "plan": {"medications": [], "labs": [], "follow_up": "PRN"},
-            "visit_summary": "Documentation complete"
-        }
-    return soap
+        for section in _build_soap(transcript).items():
+            yield section
 
-@app.get("/", response_class=HTMLResponse)
-async def frontend():
-    return """
-    <!DOCTYPE html>
-    <html><head><title>🏥 SOAP AI</title>
-    <style>body{font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto;padding:2rem;max-width:900px;margin:auto;background:#f8f9fa;}
-    textarea{width:100%;height:120px;padding:1rem;border:1px solid #ddd;border-radius:8px;font-family:monospace;font-size:14px;}
-    button{background:#007bff;color:white;padding:12px 24px;border:none;border-radius:6px;cursor:pointer;font-size:16px;font-weight:500;}
-    button:hover{background:#0056b3;}
-    .soap{background:white;padding:2rem;border-radius:12px;box-shadow:0 4px 6px rgba(0,0,0,0.1);margin-top:2rem;}
-    h1{font-size:2.5rem;color:#1a1a1a;margin-bottom:1rem;}
-    h3{color:#333;margin:1.5rem 0 0.5rem;}
-    .section{margin:1rem 0;}
-    </style></head>
-    <body>
-    <h1>🏥 Clinical SOAP Note Generator</h1>
-    <textarea id="transcript" placeholder="Paste medical transcript here...&#10;Example: Patient 52M chest pain 7/10 x4hrs BP 168/98 HR 112 troponin 2.1"></textarea><br><br>
-    <button onclick="generate()">🧠 Generate SOAP Note</button>
-    <div id="result"></div>
-    <script>
-    async function generate(){
-        document.getElementById('result').innerHTML = '<div style="padding:20px;text-align:center">Generating...</div>';
-        try{
-            const transcript = document.getElementById('transcript').value;
-            const response = await fetch('/generate-soap', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({transcript})
-            });
-            const soap = await response.json();
-            document.getElementById('result').innerHTML = `
-                <div class="soap">
-                    <h3>📋 GENERATED SOAP NOTE</h3>
-                    <div class="section"><b>👤 Subjective:</b><br>${soap.subjective.hpi}</div>
-                    <div class="section"><b>📊 Objective:</b><br>Vitals: ${soap.objective.vitals}<br>Exam: ${soap.objective.exam}<br>Labs: ${soap.objective.labs}</div>
-                    <div class="section"><b>🔍 Assessment:</b> ${soap.assessment.join(', ')}</div>
-                    <div class="section"><b>📋 Plan:</b><br>Meds: ${soap.plan.medications.join(', ')}<br>Labs: ${soap.plan.labs.join(', ')}<br>Follow-up: ${soap.plan.follow_up}</div>
-                    <div style="margin-top:2rem;padding:1rem;background:#e8f5e8;border-radius:6px">
-                        <b>✅ Ready for EHR: ${soap.visit_summary}</b>
-                    </div>
-                </div>
-            `;
-        }catch(e){
-            document.getElementById('result').innerHTML = '<div style="color:red">Error generating SOAP note</div>';
-        }
+def _rules_version() -> str:
+    if model_soap is not None:
+        return model_soap.version
+    return soap_gen.rules_version if soap_gen else "fallback"
+
+async def _compute(transcript: str) -> Tuple[bytes, str]:
+    """(body, path that served it)."""
+    if model_soap is not None:
+        note, path = await model_soap.generate(transcript)
+        return encode_soap(note), path
+    return encode_soap(_build_soap(transcript)), "rules"
+
+def soap_key(transcript: str) -> str:
+    """Content key of a (normalized) transcript under the current rules; also the ETag."""
+    version = _rules_version()
+    if result_cache is not None:
+        result_cache.ensure_version(version)
+    return content_key(transcript, version)
+
+async def render_soap_served(transcript: str, key: Optional[str] = None) -> Tuple[bytes, str]:
+    """
+    (serialized SOAP note, path that served it): result cache ("cache"), then
+    single-flight, then compute. Rules stand-ins for a missing model answer are not cached.
+    """
+    transcript = normalize_transcript(transcript)
+    key = key or soap_key(transcript)
+    if result_cache is not None:
+        body = result_cache.get(key)
+        if body is not None:
+            return body, "cache"
+    if single_flight is not None:
+        body, path = await single_flight.do(key, lambda: _compute(transcript))
+    else:
+        body, path = await _compute(transcript)
+    if result_cache is not None and path not in FALLBACK_PATHS:
+        result_cache.put(key, body)
+    return body, path
+
+async def render_soap(transcript: str, key: Optional[str] = None) -> bytes:
+    return (await render_soap_served(transcript, key))[0]
+
+def _idempotency_scope(scope: Dict[str, Any], idem_key: Optional[str]) -> Optional[str]:
+    if not idem_key or idempotency_store is None:
+        return None
+    identity = client_identity(
+        scope, dict(scope["headers"]), config.RATE_LIMIT_TRUST_FORWARDED, config.RATE_LIMIT_API_KEYS
+    )
+    return f"{identity}|{scope['path']}|{idem_key}"
+
+def _idempotent_replay(scoped: Optional[str], fingerprint: str) -> Optional[Tuple[int, bytes]]:
+    if scoped is None:
+        return None
+    try:
+        return idempotency_store.lookup(scoped, fingerprint)
+    except IdempotencyConflict:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+
+async def soap_result(
+    scope: Dict[str, Any], if_none_match: str, idem_key: Optional[str], transcript: str
+) -> Tuple[int, Dict[str, str], bytes]:
+    """Conditional (ETag) + idempotent SOAP result for the interactive routes, framework free."""
+    transcript = normalize_transcript(transcript)
+    key = soap_key(transcript)
+    headers = {"ETag": f'"{key}"'}
+    # `*` means "any current representation": a transcript never rendered has none to revalidate
+    if etag_matches(if_none_match, headers["ETag"], wildcard=False):
+        return 304, headers, b""
+    scoped = _idempotency_scope(scope, idem_key)
+    replay = _idempotent_replay(scoped, key)
+    if replay is not None:
+        headers["Idempotent-Replayed"] = "true"
+        return replay[0], headers, replay[1]
+    async with interactive_lane.slot():
+        body, headers["X-SOAP-Served-By"] = await render_soap_served(transcript, key)
+    if headers["X-SOAP-Served-By"] in FALLBACK_PATHS:
+        # A rules stand-in is not the note this ETag names; nobody may keep or replay it
+        del headers["ETag"]
+        headers["Cache-Control"] = "no-store"
+    elif scoped is not None:
+        idempotency_store.store(scoped, key, 200, body)
+    return 200, headers, body
+
+async def soap_response(request: Request, transcript: str) -> Response:
+    status, headers, body = await soap_result(
+        request.scope, request.headers.get("if-none-match", ""), request.headers.get("idempotency-key"), transcript
+    )
+    if status == 304:
+        return Response(status_code=304, headers=headers)
+    return SOAPJSONResponse(body, status_code=status, headers=headers)
+
+# Fast path: raw body bytes -> transcript, no request model is built.
+# The schema is still advertised so /docs stays accurate.
+_TRANSCRIPT_BODY_DOC = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": TranscriptInput.model_json_schema()},
+            "text/plain": {"schema": {"type": "string"}},
+        },
     }
-    document.getElementById('transcript').addEventListener('keypress', function(e){
-        if(e.key==='Enter' && e.ctrlKey) generate();
-    });
-    </script>
-    </body></html>
+}
+
+@app.post("/generate-soap", response_class=SOAPJSONResponse, openapi_extra=_TRANSCRIPT_BODY_DOC)
+async def generate(request: Request):
+    try:
+        transcript = parse_transcript(await request.body(), request.headers.get("content-type"))
+    except TranscriptParseError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return await soap_response(request, transcript)
+
+def _sse_event(event: str, data: bytes) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+@app.post("/generate-soap/stream", response_class=StreamingResponse, openapi_extra=_TRANSCRIPT_BODY_DOC)
+async def generate_stream(request: Request):
+    """
+    Server-Sent Events: one event per SOAP section, then `done`. With a
+    model the same section can come again as it fills in; the last one wins.
     """
+    try:
+        transcript = parse_transcript(await request.body(), request.headers.get("content-type"))
+    except TranscriptParseError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    # Admit before the 200 goes out; the slot is held until the stream ends.
+    # aclose() is idempotent, so the background task covers early disconnects.
+    slot = AsyncExitStack()
+    await slot.enter_async_context(interactive_lane.slot())
+
+    async def events():
+        try:
+            async for name, value in soap_sections(normalize_transcript(transcript)):
+                yield _sse_event(name, encode_generic(value))
+            yield _sse_event("done", b"{}")
+        finally:
+            await slot.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(slot.aclose),
+    )
+
+@app.post("/generate-soap/validated", response_class=SOAPJSONResponse)
+async def generate_validated(payload: TranscriptInput, request: Request):
+    """Full pydantic validation path (same output as /generate-soap)."""
+    return await soap_response(request, payload.transcript)
+
+# Async jobs: durable queue decouples HTTP latency from processing time
+if config.JOBS_ENABLED:
+    from jobs import JobStore, JobWorkers, job_json
+job_store = JobStore(
+    config.JOBS_DB_PATH,
+    max_attempts=config.JOBS_MAX_ATTEMPTS,
+    lease_seconds=config.JOBS_LEASE_SECONDS,
+) if config.JOBS_ENABLED else None
+async def render_bulk(transcript: str) -> bytes:
+    """Job generation runs in the bulk lane: bounded apart from interactive requests."""
+    async with bulk_lane.slot():
+        return await render_soap(transcript)
+
+job_workers = JobWorkers(
+    job_store,
+    render_bulk,
+    workers=config.JOBS_WORKERS,
+    batch_size=config.JOBS_BATCH_SIZE,
+    poll_interval=config.JOBS_POLL_INTERVAL,
+    webhook_allowed_hosts=config.JOBS_WEBHOOK_ALLOWED_HOSTS,
+) if job_store else None
+
+@app.post("/jobs", status_code=202)
+async def create_job(payload: JobRequest, request: Request):
+    if job_store is None:
+        raise HTTPException(status_code=404, detail="Job API disabled")
+    # A retried POST with the same Idempotency-Key must not enqueue twice
+    scoped = _idempotency_scope(request.scope, request.headers.get("idempotency-key"))
+    fingerprint = hashlib.blake2b(await request.body(), digest_size=16).hexdigest()
+    replay = _idempotent_replay(scoped, fingerprint)
+    if replay is not None:
+        return Response(replay[1], status_code=replay[0], media_type="application/json", headers={"Idempotent-Replayed": "true"})
+    job_id = await run_in_threadpool(job_store.enqueue, payload.transcripts, payload.webhook_url)
+    job_workers.notify()
+    body = encode_generic({"id": job_id, "status": "queued", "poll": f"/jobs/{job_id}"})
+    if scoped is not None:
+        idempotency_store.store(scoped, fingerprint, 202, body)
+    return Response(body, status_code=202, media_type="application/json")
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await run_in_threadpool(job_store.get, job_id) if job_store else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return Response(job_json(job), media_type="application/json")
+
+# Live dictation: fragments in, changed SOAP fields out
+live_sessions = 0
+if config.LIVE_ENABLED:
+    from live_session import LiveSession, serve_dictation
+
+async def live_dictation(websocket: WebSocket):
+    global live_sessions
+    await websocket.accept()
+    if soap_gen is None or live_sessions >= config.LIVE_MAX_SESSIONS:
+        await websocket.close(code=1013, reason="Try again later")
+        return
+    live_sessions += 1
+    try:
+        await serve_dictation(
+            websocket,
+            LiveSession(soap_gen, max_chars=config.LIVE_MAX_CHARS),
+            idle_timeout=config.LIVE_IDLE_TIMEOUT,
+            queue_size=config.LIVE_QUEUE_SIZE,
+        )
+    finally:
+        live_sessions -= 1
+
+if config.LIVE_ENABLED:
+    app.add_api_websocket_route("/ws/dictation", live_dictation)
+
+@app.get("/health/live")
+async def health_live():
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready():
+    if not ready:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready", "startup": startup_report}
+
+# Documented in the README; same contract as readiness
+app.add_api_route("/health", health_ready, methods=["GET"])
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "result_cache": result_cache.stats() if result_cache else None,
+        "single_flight": single_flight.stats() if single_flight else None,
+        "idempotency": idempotency_store.stats() if idempotency_store else None,
+        "admission": {"interactive": interactive_lane.stats(), "bulk": bulk_lane.stats()},
+        "rate_limit": rate_limiter.stats() if rate_limiter else None,
+        "model": model_soap.stats() if model_soap else None,
+        "body_guard_rejections": body_guard.stats(),
+        "live_sessions": live_sessions,
+        "startup": startup_report,
+        "jobs": dict(job_workers.stats(), queue=await run_in_threadpool(job_store.counts)) if job_workers else None,
+    }
+
+@app.get("/", response_class=HTMLResponse)
+async def frontend(request: Request):
+    return FRONTEND.response(request.headers)
 
 @app.get("/docs")
 async def docs_redirect():
     return {"docs": "http://localhost:8000/docs", "frontend": "http://localhost:8000"}
+
+# Hot endpoints as raw ASGI, ahead of every other layer (added last = outermost).
+# The FastAPI routes above stay registered: they document the API in /docs and
+# serve everything when SOAP_FAST_ROUTE=0.
+_JSON = [(b"content-type", b"application/json")]
+_ALIVE = encode_generic({"status": "alive"})
+
+def _fast_error(status: int, detail: str, headers: Optional[list] = None) -> Tuple[int, list, bytes]:
+    return status, _JSON + (headers or []), encode_generic({"detail": detail})
+
+async def fast_generate(scope: Dict[str, Any], headers: Dict[bytes, bytes], body: bytes) -> Tuple[int, list, bytes]:
+    content_type = headers.get(b"content-type")
+    try:
+        transcript = parse_transcript(body, content_type.decode("latin-1") if content_type else None)
+        status, out, payload = await soap_result(
+            scope,
+            headers.get(b"if-none-match", b"").decode("latin-1"),
+            headers[b"idempotency-key"].decode("latin-1") if b"idempotency-key" in headers else None,
+            transcript,
+        )
+    except TranscriptParseError as e:
+        return _fast_error(e.status_code, e.detail)
+    except HTTPException as e:
+        return _fast_error(e.status_code, e.detail)
+    except Overloaded as e:
+        return _fast_error(503, _overloaded_detail(e), [(b"retry-after", str(e.retry_after).encode())])
+    raw = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in out.items()]
+    return status, raw if status == 304 else _JSON + raw, payload
+
+async def fast_health_live(scope: Dict[str, Any], headers: Dict[bytes, bytes], body: bytes) -> Tuple[int, list, bytes]:
+    return 200, _JSON, _ALIVE
+
+if config.FAST_ROUTE_ENABLED:
+    from fast_route import AllowAllCORS, FastRouteMiddleware
+    app.add_middleware(
+        FastRouteMiddleware,
+        routes={("POST", "/generate-soap"): fast_generate, ("GET", "/health/live"): fast_health_live},
+        cors=AllowAllCORS(allow_credentials=True),  # same policy as the CORSMiddleware above
+        limiter=rate_limiter,
+        guard=body_guard,
+    )
+
+timeline.mark("routes")
@@ -0,0 +1,148 @@
+"""
+🛡️ Streaming request-body guard
+✅ 413 on Content-Length or on the running byte count - never buffers past the limit
+✅ 415 for unexpected content types before a single body byte is read
+✅ 408 for slow uploads (per-chunk timeout + minimum average rate)
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, FrozenSet, Optional
+
+Scope = Dict[str, Any]
+
+
+class BodyRule:
+    def __init__(self, max_bytes: int, content_types: FrozenSet[str]):
+        self.max_bytes = max_bytes
+        self.content_types = content_types
+
+
+class _Reject(Exception):
+    def __init__(self, status: int, detail: str):
+        self.status = status
+        self.detail = detail
+
+
+class BodyGuard:
+    def __init__(
+        self,
+        rules: Dict[str, BodyRule],
+        chunk_timeout: float = 10.0,
+        min_rate: float = 1024.0,
+        grace_seconds: float = 2.0,
+    ):
+        self.rules = rules
+        self.chunk_timeout = chunk_timeout
+        self.min_rate = min_rate
+        self.grace_seconds = grace_seconds
+        self.rejected = {413: 0, 415: 0, 408: 0}
+
+    def rule_for(self, scope: Scope) -> Optional[BodyRule]:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return None
+        return self.rules.get(scope["path"])
+
+    def check_headers(self, scope: Scope, rule: BodyRule) -> None:
+        content_type: Optional[bytes] = None
+        content_length: Optional[bytes] = None
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                content_type = value
+            elif name == b"content-length":
+                content_length = value
+        kind = (content_type or b"application/json").split(b";", 1)[0].strip().lower().decode("latin-1")
+        if kind not in rule.content_types:
+            raise _Reject(415, f"Unsupported content type: {kind}")
+        if content_length is not None and content_length.isdigit() and int(content_length) > rule.max_bytes:
+            raise _Reject(413, f"Body exceeds {rule.max_bytes} bytes")
+
+    async def read_body(self, receive, rule: BodyRule) -> bytes:
+        chunks = []
+        size = 0
+        started = time.monotonic()
+        more = True
+        while more:
+            try:
+                message = await asyncio.wait_for(receive(), self.chunk_timeout)
+            except asyncio.TimeoutError:
+                raise _Reject(408, "Request body timed out")
+            if message["type"] == "http.disconnect":
+                raise _Reject(408, "Client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > rule.max_bytes:
+                raise _Reject(413, f"Body exceeds {rule.max_bytes} bytes")
+            chunks.append(chunk)
+            more = message.get("more_body", False)
+            elapsed = time.monotonic() - started
+            if more and elapsed > self.grace_seconds and size / elapsed < self.min_rate:
+                raise _Reject(408, "Request body too slow")
+        return b"".join(chunks)
+
+    async def refused(self, scope: Scope, send, rule: BodyRule) -> bool:
+        """Headers-only 413/415, sent if due; lets the rate limiter skip charging a body that will be refused."""
+        try:
+            self.check_headers(scope, rule)
+        except _Reject as e:
+            self.rejected[e.status] += 1
+            await _send_error(send, e.status, e.detail)
+            return True
+        return False
+
+    async def guarded_body(self, scope: Scope, receive, send, rule: BodyRule) -> Optional[bytes]:
+        """The whole body under `rule`, or None once a 413/415/408 has been sent."""
+        try:
+            self.check_headers(scope, rule)
+            return await self.read_body(receive, rule)
+        except _Reject as e:
+            self.rejected[e.status] += 1
+            await _send_error(send, e.status, e.detail)
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        return {str(status): n for status, n in self.rejected.items()}
+
+
+class BodyGuardMiddleware:
+    """
+    For guarded POST routes the body is read here, chunk by chunk, under
+    the limits, and then handed to the app in one piece.
+    """
+
+    def __init__(self, app, guard: BodyGuard):
+        self.app = app
+        self.guard = guard
+
+    async def __call__(self, scope: Scope, receive, send) -> None:
+        guard = self.guard
+        rule = guard.rule_for(scope)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+        body = await guard.guarded_body(scope, receive, send, rule)
+        if body is None:
+            return
+
+        delivered = False
+
+        async def replay() -> Dict[str, Any]:
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()  # only http.disconnect from here on
+
+        await self.app(scope, replay, send)
+
+
+async def _send_error(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"connection", b"close"),
+    ]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
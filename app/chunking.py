@@ -0,0 +1,105 @@
+"""
+🧩 Map-reduce helpers for transcripts longer than the model's context
+✅ Splits at speaker turns (sentences inside an oversized turn), never mid-sentence
+✅ Consecutive chunks overlap by a few turns so a question and its answer stay together
+✅ Deterministic merge: lists deduped in order, vitals / follow-up from the latest chunk,
+   labs deduped by name with the latest value winning
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Sequence
+
+from compaction import estimate_tokens, split_sentences, split_turns
+
+
+def split_chunks(transcript: str, max_tokens: int, overlap_turns: int = 1) -> List[str]:
+    """Chunks of at most ~`max_tokens` estimated tokens (a single oversized sentence is kept whole)."""
+    units: List[str] = []
+    for turn in split_turns(transcript):
+        if estimate_tokens(turn) > max_tokens:
+            units.extend(split_sentences(turn))
+        else:
+            units.append(turn.strip())
+    sizes = [estimate_tokens(unit) for unit in units]
+
+    chunks: List[str] = []
+    start = 0
+    while start < len(units):
+        end, total = start, 0
+        while end < len(units) and (end == start or total + sizes[end] <= max_tokens):
+            total += sizes[end]
+            end += 1
+        chunks.append("\n".join(units[start:end]))
+        if end >= len(units):
+            break
+        # Step back for the overlap, but always move forward and keep the overlap under half a chunk
+        back = 0
+        while back < overlap_turns and end - back - 1 > start and sum(sizes[end - back - 1:end]) <= max_tokens // 2:
+            back += 1
+        start = end - back
+    return chunks
+
+
+def _norm(item: str) -> str:
+    return " ".join(item.lower().split())
+
+
+def _union(values: Sequence[List[str]]) -> List[str]:
+    seen = set()
+    merged = []
+    for items in values:
+        for item in items:
+            key = _norm(item) if isinstance(item, str) else ""
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return merged
+
+
+_LAB_ITEM = re.compile(r"\s*[,;]\s*")
+
+
+def _merge_labs(values: Sequence[str]) -> str:
+    """"HbA1c: 7.8, Troponin: 0.1" items keyed by lab name; a later chunk's value replaces an earlier one."""
+    labs: Dict[str, str] = {}
+    for text in values:
+        for item in _LAB_ITEM.split(text):
+            if item:
+                labs[_norm(item.split(":", 1)[0])] = item
+    return ", ".join(labs.values())
+
+
+def _join(values: Sequence[str]) -> str:
+    return "; ".join(_union([[value] for value in values]))
+
+
+# How each field is reduced across chunks (values in chunk order, empty ones already removed)
+MERGE: Dict[str, Callable[[Sequence[Any]], Any]] = {
+    "subjective.chief_complaint": lambda values: values[0],  # the reason for the visit comes first
+    "subjective.hpi": lambda values: values[0],
+    "objective.vitals": lambda values: values[-1],  # latest measurement
+    "objective.exam": _join,
+    "objective.labs": _merge_labs,
+    "assessment": _union,
+    "plan.medications": _union,
+    "plan.labs": _union,
+    "plan.follow_up": lambda values: values[-1],
+    "visit_summary": lambda values: values[0],
+}
+
+
+LIST_FIELDS = frozenset({"assessment", "plan.medications", "plan.labs"})
+
+
+def merge_fields(partials: Sequence[Dict[str, Any]], fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    {path: value} answers from each chunk, in chunk order -> one value per
+    path that any chunk answered. Values of the wrong shape are ignored.
+    """
+    merged = {}
+    for path in fields:
+        kind = list if path in LIST_FIELDS else str
+        values = [partial[path] for partial in partials if partial.get(path) and isinstance(partial[path], kind)]
+        if values:
+            merged[path] = MERGE[path](values)
+    return merged
@@ -0,0 +1,228 @@
+"""
+✂️ Transcript compaction before prompting
+✅ One pass over the turns: fillers out, stutters and repeated phrases collapsed
+✅ Drops turns said twice in a row and turns with no clinical lexicon hit (small talk)
+✅ Cheap token estimator + hard budget; turns carrying numbers (vitals, labs, doses) go last
+✅ Reports tokens before/after so the savings show up in /metrics
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+from soap_generator import KEYWORDS
+
+# Turn boundaries: line breaks and speaker labels ("Doctor:", "Pt:")
+_TURNS = re.compile(r"\n+|(?=\b(?:doctor|dr|patient|pt|nurse|provider|clinician|parent|caregiver)\s*:)", re.IGNORECASE)
+_SENTENCES = re.compile(r"(?<=[.!?])\s+")
+
+_FILLERS = re.compile(
+    r"\b(?:u+[hm]+|erm+|h+m+|m+h+m+)\b[,.]?\s*"
+    r"|\b(?:you know|i mean|like i said|basically|literally)\b,?\s*"
+    r"|\blike,\s*",
+    re.IGNORECASE,
+)
+# "I I I think", "it hurts it hurts": a word or phrase of up to four words said again at once
+_WORD = re.compile(r"[A-Za-z']+")
+_REPEAT_GAP = re.compile(r"[\s,]+")  # between a phrase and its repeat
+_PHRASE_GAP = re.compile(r"\s+")  # between the words of one phrase
+_MAX_PHRASE = 4
+_SPACES = re.compile(r"[ \t]{2,}")
+_ORPHAN_PUNCT = re.compile(r"\s+([,.?!])")
+
+# Word starts that mark a turn as clinical, on top of the rule engine's keywords
+CLINICAL_TERMS = (
+    "ache", "hurt", "sore", "swell", "rash", "itch", "bleed", "nause", "vomit", "diarr", "constip",
+    "dizz", "faint", "breath", "wheez", "chill", "sweat", "fatigue", "tired", "weak", "numb", "tingl",
+    "headache", "migraine", "blood", "heart", "lung", "abdom", "stomach", "back", "joint", "knee",
+    "hip", "shoulder", "throat", "ear", "eye", "skin", "urin", "sleep", "appetite", "weight",
+    "allerg", "medic", "mg", "dose", "tablet", "pill", "prescri", "inhaler", "insulin", "metformin",
+    "aspirin", "statin", "lab", "test", "result", "scan", "x-ray", "xray", "mri", "ecg", "ekg",
+    "biopsy", "diagnos", "history", "surgery", "smok", "alcohol", "pregnan", "period", "since",
+    "day", "week", "month", "year", "worse", "better", "start", "exam", "temperature", "vital",
+    "asthma", "copd", "hypertension", "infection", "follow", "refer", "symptom", "bp", "hr",
+)
+_CLINICAL = re.compile(
+    r"\b(?:" + "|".join(re.escape(term) for term in sorted(set(CLINICAL_TERMS) | set(KEYWORDS), key=len, reverse=True)) + ")",
+    re.IGNORECASE,
+)
+_DIGIT = re.compile(r"\d")
+
+_TOKENS = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    BPE-like estimate without a tokenizer: one token per word piece of up to
+    8 letters, per 1-3 digit group and per punctuation mark.
+    """
+    count = 0
+    for match in _TOKENS.finditer(text):
+        count += 1 + (len(match.group()) - 1) // 8
+    return count
+
+
+class Compacted:
+    __slots__ = ("text", "tokens_before", "tokens_after", "turns_in", "turns_dropped", "over_budget")
+
+    def __init__(self, text: str, tokens_before: int, tokens_after: int, turns_in: int, turns_dropped: int,
+                 over_budget: bool):
+        self.text = text
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+        self.turns_in = turns_in
+        self.turns_dropped = turns_dropped
+        self.over_budget = over_budget  # still above budget with only value-carrying turns left
+
+
+def split_turns(transcript: str) -> List[str]:
+    """Speaker turns / lines; sentences when the transcript has neither."""
+    turns = [t for t in _TURNS.split(transcript) if t and t.strip()]
+    if len(turns) <= 1:
+        turns = split_sentences(transcript)
+    return turns
+
+
+def split_sentences(text: str) -> List[str]:
+    return [t for t in _SENTENCES.split(text) if t.strip()]
+
+
+def collapse_repeats(text: str) -> str:
+    """
+    Drops a phrase of up to _MAX_PHRASE words that repeats the words just
+    kept. One pass over the words, each compared with at most the last few
+    kept: linear, where a backreference regex goes quadratic on long runs.
+    """
+    words: List[str] = []
+    gaps: List[str] = []  # gaps[k]: the text before words[k]
+    end = 0
+    for match in _WORD.finditer(text):
+        gaps.append(text[end:match.start()])
+        words.append(match.group())
+        end = match.end()
+    if len(words) < 2:
+        return text
+    lower = [word.lower() for word in words]
+    kept: List[int] = []
+    i = 0
+    while i < len(words):
+        for n in range(min(_MAX_PHRASE, len(kept), len(words) - i), 0, -1):
+            previous = kept[-n:]
+            if (
+                all(lower[k] == lower[i + offset] for offset, k in enumerate(previous))
+                and _REPEAT_GAP.fullmatch(gaps[i])
+                and all(_PHRASE_GAP.fullmatch(gaps[k]) for k in previous[1:])
+                and all(_PHRASE_GAP.fullmatch(gaps[j]) for j in range(i + 1, i + n))
+            ):
+                i += n  # the text after the repeat follows the kept phrase directly
+                break
+        else:
+            kept.append(i)
+            i += 1
+    if len(kept) == len(words):
+        return text
+    # Skipped words take the gap before them along; the next kept word brings its own
+    return "".join(gaps[k] + words[k] for k in kept) + text[end:]
+
+
+def _clean(turn: str) -> str:
+    turn = _FILLERS.sub("", turn)
+    turn = collapse_repeats(turn)
+    turn = _SPACES.sub(" ", turn)
+    return _ORPHAN_PUNCT.sub(r"\1", turn).strip(" ,")
+
+
+class TranscriptCompactor:
+    """
+    Rules extraction always runs on the raw transcript; only the text the
+    model sees is compacted, so no extracted value can be lost here. The
+    budget is a hard cap on the estimated tokens of one prompt's transcript:
+    a transcript that will be chunked is compacted with `fit=False` and each
+    chunk is cut to the budget with fit().
+    """
+
+    def __init__(self, token_budget: int = 3000):
+        self.token_budget = token_budget
+        self.calls = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.turns_in = 0
+        self.turns_dropped = 0
+        self.over_budget = 0
+
+    def compact(self, transcript: str, fit: bool = True) -> Compacted:
+        raw_turns = split_turns(transcript)
+        kept: List[Tuple[str, bool, int]] = []  # (text, has a number, tokens)
+        previous = ""
+        previous_asked = False
+        for turn in raw_turns:
+            text = _clean(turn)
+            signature = text.lower()
+            # Only a back-to-back repeat is noise: "Yes." to two different questions is two answers
+            if not text or signature == previous:
+                continue
+            previous = signature
+            clinical = _CLINICAL.search(text) is not None
+            numeric = _DIGIT.search(text) is not None
+            # A short answer ("Yes, both") right after a clinical question stays
+            if clinical or numeric or previous_asked:
+                kept.append((text, numeric, estimate_tokens(text)))
+                previous_asked = clinical and text.endswith("?")
+            else:
+                previous_asked = False
+
+        before = estimate_tokens(transcript)
+        total = sum(tokens for _, _, tokens in kept)
+        over = False
+        if fit and total > self.token_budget:
+            kept, total, over = self._fit(kept)
+        compacted = Compacted("\n".join(text for text, _, _ in kept), before, total, len(raw_turns),
+                              len(raw_turns) - len(kept), over)
+        self.calls += 1
+        self.tokens_before += before
+        self.tokens_after += total
+        self.turns_in += len(raw_turns)
+        self.turns_dropped += compacted.turns_dropped
+        self.over_budget += over
+        return compacted
+
+    def fit(self, text: str) -> str:
+        """An already compacted transcript (or chunk of one) cut to the token budget."""
+        kept = [(turn, _DIGIT.search(turn) is not None, estimate_tokens(turn)) for turn in text.split("\n")]
+        total = sum(tokens for _, _, tokens in kept)
+        if total <= self.token_budget:
+            return text
+        kept, fitted, over = self._fit(kept)
+        self.tokens_after -= total - fitted
+        self.over_budget += over
+        return "\n".join(turn for turn, _, _ in kept)
+
+    def _fit(self, kept: List[Tuple[str, bool, int]]) -> Tuple[List[Tuple[str, bool, int]], int, bool]:
+        """Turns with numbers first, then by clinical terms per token; original order is kept in the output."""
+        density = [len(_CLINICAL.findall(text)) / max(tokens, 1) for text, _, tokens in kept]
+        ranked = sorted(range(len(kept)), key=lambda i: (not kept[i][1], -density[i], i))
+        chosen: List[int] = []
+        total = 0
+        over = False
+        for i in ranked:
+            tokens = kept[i][2]
+            if total + tokens <= self.token_budget:
+                chosen.append(i)
+                total += tokens
+            elif kept[i][1]:
+                over = True  # a value-carrying turn did not fit
+        chosen.sort()
+        return [kept[i] for i in chosen], total, over
+
+    def stats(self) -> Dict[str, Any]:
+        saved = self.tokens_before - self.tokens_after
+        return {
+            "token_budget": self.token_budget,
+            "calls": self.calls,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": saved,
+            "saved_ratio": round(saved / self.tokens_before, 4) if self.tokens_before else 0.0,
+            "turns_in": self.turns_in,
+            "turns_dropped": self.turns_dropped,
+            "over_budget": self.over_budget,
+        }
@@ -0,0 +1,149 @@
+"""
+⚙️ Runtime configuration (environment driven, Render friendly)
+All knobs are plain env vars so the Docker image never needs rebuilding.
+"""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Raw ASGI fast route for /generate-soap (FastAPI route stays as fallback + docs)
+FAST_ROUTE_ENABLED = _env_bool("SOAP_FAST_ROUTE", True)
+
+# Result cache (content-hash keyed, pre-serialized JSON bytes)
+RESULT_CACHE_ENABLED = _env_bool("SOAP_RESULT_CACHE", True)
+RESULT_CACHE_MAX_ENTRIES = _env_int("SOAP_RESULT_CACHE_MAX_ENTRIES", 2048)
+RESULT_CACHE_MAX_BYTES = _env_int("SOAP_RESULT_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+RESULT_CACHE_TTL_SECONDS = _env_float("SOAP_RESULT_CACHE_TTL", 15 * 60)
+
+# Coalesce concurrent generations of the same transcript
+SINGLE_FLIGHT_ENABLED = _env_bool("SOAP_SINGLE_FLIGHT", True)
+
+# Frontend Cache-Control max-age. 0 (default): "no-cache", browsers revalidate with the ETag
+# every time (a 304 when unchanged), so a deploy shows up at once. The page URL is not
+# fingerprinted, so a longer max-age serves the old page until it runs out
+STATIC_MAX_AGE_SECONDS = _env_int("SOAP_STATIC_MAX_AGE", 0)
+
+# Admission control (CoDel-style shedding on queueing delay), per lane
+INTERACTIVE_MAX_CONCURRENCY = _env_int("SOAP_INTERACTIVE_CONCURRENCY", 16)
+INTERACTIVE_MAX_QUEUE = _env_int("SOAP_INTERACTIVE_QUEUE", 64)
+INTERACTIVE_TARGET_DELAY = _env_float("SOAP_INTERACTIVE_TARGET_DELAY", 0.05)
+INTERACTIVE_INTERVAL = _env_float("SOAP_INTERACTIVE_INTERVAL", 0.5)
+BULK_MAX_CONCURRENCY = _env_int("SOAP_BULK_CONCURRENCY", 2)
+BULK_MAX_QUEUE = _env_int("SOAP_BULK_QUEUE", 16)
+BULK_TARGET_DELAY = _env_float("SOAP_BULK_TARGET_DELAY", 0.5)
+BULK_INTERVAL = _env_float("SOAP_BULK_INTERVAL", 2.0)
+
+# Token-bucket rate limiting per API key / client IP
+RATE_LIMIT_ENABLED = _env_bool("SOAP_RATE_LIMIT", True)
+RATE_LIMIT_RATE = _env_float("SOAP_RATE_LIMIT_RATE", 10.0)  # tokens per second
+RATE_LIMIT_BURST = _env_float("SOAP_RATE_LIMIT_BURST", 60.0)
+RATE_LIMIT_BYTES_PER_TOKEN = _env_int("SOAP_RATE_LIMIT_BYTES_PER_TOKEN", 1000)
+RATE_LIMIT_BACKEND = os.getenv("SOAP_RATE_LIMIT_BACKEND", "memory")  # memory | sqlite:/path/to/file
+RATE_LIMIT_TRUST_FORWARDED = _env_bool("SOAP_RATE_LIMIT_TRUST_FORWARDED", False)
+# SHA-256 hex digests of the API keys that get their own bucket (comma-separated); others count by IP
+RATE_LIMIT_API_KEYS = frozenset(
+    digest.strip().lower() for digest in os.getenv("SOAP_RATE_LIMIT_API_KEYS", "").split(",") if digest.strip()
+)
+RATE_LIMIT_MAX_CLIENTS = _env_int("SOAP_RATE_LIMIT_MAX_CLIENTS", 100_000)
+
+# Async job queue (SQLite WAL file, drained by in-process workers)
+JOBS_ENABLED = _env_bool("SOAP_JOBS", True)
+JOBS_DB_PATH = os.getenv("SOAP_JOBS_DB", "jobs.db")
+JOBS_WORKERS = _env_int("SOAP_JOBS_WORKERS", 2)
+JOBS_BATCH_SIZE = _env_int("SOAP_JOBS_BATCH_SIZE", 8)
+JOBS_MAX_ATTEMPTS = _env_int("SOAP_JOBS_MAX_ATTEMPTS", 3)
+JOBS_LEASE_SECONDS = _env_float("SOAP_JOBS_LEASE", 120.0)
+JOBS_POLL_INTERVAL = _env_float("SOAP_JOBS_POLL_INTERVAL", 0.5)
+# Webhooks only go to public addresses; hosts listed here (comma-separated) may resolve anywhere
+JOBS_WEBHOOK_ALLOWED_HOSTS = frozenset(
+    host.strip().lower() for host in os.getenv("SOAP_JOBS_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+)
+
+# Live dictation WebSocket
+LIVE_ENABLED = _env_bool("SOAP_LIVE", True)
+LIVE_MAX_SESSIONS = _env_int("SOAP_LIVE_MAX_SESSIONS", 100)
+LIVE_MAX_CHARS = _env_int("SOAP_LIVE_MAX_CHARS", 200_000)
+LIVE_IDLE_TIMEOUT = _env_float("SOAP_LIVE_IDLE_TIMEOUT", 120.0)
+LIVE_QUEUE_SIZE = _env_int("SOAP_LIVE_QUEUE_SIZE", 32)
+
+# Idempotency-Key replay window for retried POSTs
+IDEMPOTENCY_ENABLED = _env_bool("SOAP_IDEMPOTENCY", True)
+IDEMPOTENCY_MAX_ENTRIES = _env_int("SOAP_IDEMPOTENCY_MAX_ENTRIES", 10000)
+IDEMPOTENCY_MAX_BYTES = _env_int("SOAP_IDEMPOTENCY_MAX_BYTES", 32 * 1024 * 1024)
+IDEMPOTENCY_TTL_SECONDS = _env_float("SOAP_IDEMPOTENCY_TTL", 24 * 60 * 60)
+
+# Request body guard: size caps, content types and slow-upload cutoff
+BODY_MAX_BYTES = _env_int("SOAP_BODY_MAX_BYTES", 64 * 1024)
+JOBS_BODY_MAX_BYTES = _env_int("SOAP_JOBS_BODY_MAX_BYTES", 4 * 1024 * 1024)
+BODY_CHUNK_TIMEOUT = _env_float("SOAP_BODY_CHUNK_TIMEOUT", 10.0)
+BODY_MIN_RATE = _env_float("SOAP_BODY_MIN_RATE", 1024.0)  # bytes/second after the grace period
+BODY_GRACE_SECONDS = _env_float("SOAP_BODY_GRACE", 2.0)
+
+# Model backend: "" (rules only), "ollama" or "openai" (any OpenAI-compatible server)
+MODEL_BACKEND = os.getenv("SOAP_MODEL_BACKEND", "").strip().lower()
+MODEL_URL = os.getenv("SOAP_MODEL_URL", "http://localhost:11434")
+MODEL_NAME = os.getenv("SOAP_MODEL_NAME", "llama3.2:3b")
+# "hybrid": rules first, model only for fields the rules could not fill; "full": model writes it all
+MODEL_MODE = os.getenv("SOAP_MODEL_MODE", "hybrid").strip().lower()
+MODEL_API_KEY = os.getenv("SOAP_MODEL_API_KEY", "")
+MODEL_MAX_CONCURRENCY = _env_int("SOAP_MODEL_MAX_CONCURRENCY", 4)
+MODEL_TIMEOUT = _env_float("SOAP_MODEL_TIMEOUT", 20.0)
+MODEL_KEEPALIVE_EXPIRY = _env_float("SOAP_MODEL_KEEPALIVE_EXPIRY", 30.0)
+MODEL_TEMPERATURE = _env_float("SOAP_MODEL_TEMPERATURE", 0.1)
+# Stream tokens and stop generation as soon as the JSON answer is complete
+MODEL_STREAM = _env_bool("SOAP_MODEL_STREAM", True)
+# OpenAI-compatible only: send a batch as one /v1/completions call with a list of prompts
+MODEL_BATCH_PROMPTS = _env_bool("SOAP_MODEL_BATCH_PROMPTS", False)
+# Micro-batching: concurrent model calls wait up to MAX_WAIT_MS to share one dispatch.
+# On by default only where a batch is one request; a gather of single calls gains nothing
+MODEL_BATCHING = _env_bool("SOAP_MODEL_BATCHING", MODEL_BACKEND == "openai" and MODEL_BATCH_PROMPTS)
+MODEL_BATCH_MAX_SIZE = _env_int("SOAP_MODEL_BATCH_MAX_SIZE", 8)
+MODEL_BATCH_MAX_WAIT_MS = _env_float("SOAP_MODEL_BATCH_MAX_WAIT_MS", 5.0)
+# Prefix reuse: evaluate the static system prompt once at startup and keep the model loaded
+MODEL_PRIME = _env_bool("SOAP_MODEL_PRIME", True)
+MODEL_PRIME_TIMEOUT = _env_float("SOAP_MODEL_PRIME_TIMEOUT", 60.0)
+MODEL_KEEP_ALIVE = os.getenv("SOAP_MODEL_KEEP_ALIVE", "30m")  # Ollama only
+MODEL_PROMPT_CACHE_KEY = os.getenv("SOAP_MODEL_PROMPT_CACHE_KEY", "")  # OpenAI-compatible only
+# Circuit breaker: over the last WINDOW calls, open on failure rate or slow-call rate, then
+# answer from the rules without calling the model for OPEN_SECONDS before probing again
+MODEL_BREAKER = _env_bool("SOAP_MODEL_BREAKER", True)
+MODEL_BREAKER_WINDOW = _env_int("SOAP_MODEL_BREAKER_WINDOW", 20)
+MODEL_BREAKER_MIN_CALLS = _env_int("SOAP_MODEL_BREAKER_MIN_CALLS", 5)
+MODEL_BREAKER_FAILURE_RATE = _env_float("SOAP_MODEL_BREAKER_FAILURE_RATE", 0.5)
+MODEL_BREAKER_SLOW_CALL = _env_float("SOAP_MODEL_BREAKER_SLOW_CALL", 5.0)  # seconds
+MODEL_BREAKER_SLOW_CALL_RATE = _env_float("SOAP_MODEL_BREAKER_SLOW_CALL_RATE", 0.8)
+MODEL_BREAKER_OPEN_SECONDS = _env_float("SOAP_MODEL_BREAKER_OPEN_SECONDS", 15.0)
+MODEL_BREAKER_HALF_OPEN_PROBES = _env_int("SOAP_MODEL_BREAKER_HALF_OPEN_PROBES", 1)
+# Hedging: a second instance of the same backend, asked when the first is slower than its p95
+MODEL_HEDGE_URL = os.getenv("SOAP_MODEL_HEDGE_URL", "")
+MODEL_HEDGE_MIN_DELAY_MS = _env_float("SOAP_MODEL_HEDGE_MIN_DELAY_MS", 50.0)
+# Persistent model-output cache (SQLite, shared by all workers on the host); "" turns it off
+MODEL_CACHE_DB = os.getenv("SOAP_MODEL_CACHE_DB", "model_cache.db")
+MODEL_CACHE_MAX_BYTES = _env_int("SOAP_MODEL_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+# Compaction: fillers, repeats and small talk are cut from the transcript the model sees,
+# and what each prompt gets (each chunk, when split) is held to a hard budget of estimated tokens
+MODEL_COMPACT = _env_bool("SOAP_MODEL_COMPACT", True)
+MODEL_PROMPT_TOKEN_BUDGET = _env_int("SOAP_MODEL_PROMPT_TOKEN_BUDGET", 2048)
+# Map-reduce: transcripts over this many estimated tokens are split into overlapping chunks
+# that are prompted concurrently and merged; 0 never splits
+MODEL_CHUNK_TOKENS = _env_int("SOAP_MODEL_CHUNK_TOKENS", 1024)
+MODEL_CHUNK_OVERLAP_TURNS = _env_int("SOAP_MODEL_CHUNK_OVERLAP_TURNS", 1)
+# Model output that local repair cannot fix is asked for again at most this many times
+MODEL_REPROMPTS = _env_int("SOAP_MODEL_REPROMPTS", 1)
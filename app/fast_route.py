@@ -0,0 +1,152 @@
+"""
+⚡ Raw ASGI fast route for the hot endpoints
+✅ Mounted in front of FastAPI: no routing, dependency or response-model layers
+✅ CORS preflight answered from headers computed once at startup
+✅ Body read straight from `receive`, bytes sent straight to `send`
+✅ Anything it does not own falls through to the regular app (/docs unchanged)
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from body_guard import BodyGuard
+from ratelimit import RateLimiter, send_rate_limited
+
+Scope = Dict[str, Any]
+Headers = List[Tuple[bytes, bytes]]
+# (scope, request headers, body) -> (status, response headers, response body)
+Handler = Callable[[Scope, Dict[bytes, bytes], bytes], Awaitable[Tuple[int, Headers, bytes]]]
+
+# Same list Starlette's CORSMiddleware expands allow_methods=["*"] to
+ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+
+
+class AllowAllCORS:
+    """
+    Precomputed equivalent of CORSMiddleware(allow_origins=["*"],
+    allow_methods=["*"], allow_headers=["*"]): identical headers, no
+    per-request Headers/MutableHeaders objects.
+    """
+
+    def __init__(self, allow_credentials: bool = True, max_age: int = 600):
+        self.allow_credentials = allow_credentials
+        self.simple: Headers = [(b"access-control-allow-origin", b"*")]
+        self.preflight: Headers = [
+            (b"access-control-allow-methods", ", ".join(ALL_METHODS).encode()),
+            (b"access-control-max-age", str(max_age).encode()),
+        ]
+        if allow_credentials:
+            self.simple.append((b"access-control-allow-credentials", b"true"))
+            self.preflight.append((b"access-control-allow-credentials", b"true"))
+            # With credentials the origin must be echoed, never "*"
+            self.preflight.append((b"vary", b"Origin"))
+        else:
+            self.preflight.append((b"access-control-allow-origin", b"*"))
+
+    def is_preflight(self, scope: Scope, headers: Dict[bytes, bytes]) -> bool:
+        return scope["method"] == "OPTIONS" and b"origin" in headers and b"access-control-request-method" in headers
+
+    def preflight_response(self, headers: Dict[bytes, bytes]) -> Tuple[int, Headers, bytes]:
+        out = list(self.preflight)
+        if self.allow_credentials:
+            out.append((b"access-control-allow-origin", headers[b"origin"]))
+        requested = headers.get(b"access-control-request-headers")
+        if requested is not None:
+            out.append((b"access-control-allow-headers", requested))
+        if headers[b"access-control-request-method"].decode("latin-1") not in ALL_METHODS:
+            return 400, out, b"Disallowed CORS method"
+        return 200, out, b"OK"
+
+    def response_headers(self, headers: Dict[bytes, bytes]) -> Headers:
+        """Headers added to an actual (non-preflight) cross-origin response."""
+        if b"cookie" in headers:
+            out = [(k, v) for k, v in self.simple if k != b"access-control-allow-origin"]
+            return out + [(b"access-control-allow-origin", headers[b"origin"]), (b"vary", b"Origin")]
+        return self.simple
+
+
+async def _send(send, status: int, headers: Headers, body: bytes) -> None:
+    if status != 304:
+        headers = headers + [(b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class FastRouteMiddleware:
+    """
+    Serves `routes` ({(method, path): handler}) and CORS preflights itself;
+    rate limiting and the body guard run exactly as in the full stack.
+    """
+
+    def __init__(
+        self,
+        app,
+        routes: Dict[Tuple[str, str], Handler],
+        cors: Optional[AllowAllCORS] = None,
+        limiter: Optional[RateLimiter] = None,
+        guard: Optional[BodyGuard] = None,
+    ):
+        self.app = app
+        self.routes = routes
+        self.cors = cors
+        self.limiter = limiter
+        self.guard = guard
+
+    async def __call__(self, scope: Scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        handler = self.routes.get((scope["method"], scope["path"]))
+        cors = self.cors
+        if handler is None and cors is None:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if cors is not None and cors.is_preflight(scope, headers):
+            status, out, body = cors.preflight_response(headers)
+            await _send(send, status, out + [(b"content-type", b"text/plain; charset=utf-8")], body)
+            return
+        if handler is None:
+            await self.app(scope, receive, send)
+            return
+
+        if cors is not None and b"origin" in headers:
+            send = _with_headers(send, cors.response_headers(headers))
+
+        rule = self.guard.rule_for(scope) if self.guard is not None else None
+        # A body the guard refuses on its headers alone is answered before it costs any tokens
+        if rule is not None and await self.guard.refused(scope, send, rule):
+            return
+        if self.limiter is not None and self.limiter.applies(scope):
+            wait, receive = await self.limiter.check(scope, receive)
+            if wait:
+                await send_rate_limited(send, wait)
+                return
+        if rule is not None:
+            body = await self.guard.guarded_body(scope, receive, send, rule)
+            if body is None:
+                return
+        else:
+            body = await _read_body(receive)
+        status, out, payload = await handler(scope, headers, body)
+        await _send(send, status, out, payload)
+
+
+def _with_headers(send, extra: Headers):
+    async def wrapped(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            message["headers"] = list(message["headers"]) + extra
+        await send(message)
+
+    return wrapped
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    more = True
+    while more:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        more = message.get("more_body", False)
+    return b"".join(chunks)
@@ -0,0 +1,67 @@
+"""
+🚀 Zero-overhead transcript parsing on raw body bytes
+✅ application/json parsed with jiter (json fallback) - no pydantic model built
+✅ text/plain bodies skip JSON entirely
+✅ Enforces schemas.TranscriptInput length limits by hand
+"""
+
+import json
+from typing import Optional
+
+from schemas import TRANSCRIPT_MAX_LENGTH, TRANSCRIPT_MIN_LENGTH
+
+try:
+    import jiter
+except ImportError:
+    jiter = None
+
+
+class TranscriptParseError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def media_type(content_type: Optional[str]) -> str:
+    if not content_type:
+        return "application/json"
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def _loads(body: bytes):
+    if jiter is not None:
+        # Only cache keys: transcripts are large and never repeat as values
+        return jiter.from_json(body, cache_mode="keys")
+    return json.loads(body)
+
+
+def check_length(transcript: str) -> str:
+    if len(transcript) < TRANSCRIPT_MIN_LENGTH:
+        raise TranscriptParseError(422, f"transcript should have at least {TRANSCRIPT_MIN_LENGTH} characters")
+    if len(transcript) > TRANSCRIPT_MAX_LENGTH:
+        raise TranscriptParseError(422, f"transcript should have at most {TRANSCRIPT_MAX_LENGTH} characters")
+    return transcript
+
+
+def parse_transcript(body: bytes, content_type: Optional[str]) -> str:
+    """Pull `transcript` out of a raw request body."""
+    kind = media_type(content_type)
+    if kind == "text/plain":
+        try:
+            return check_length(body.decode("utf-8"))
+        except UnicodeDecodeError:
+            raise TranscriptParseError(422, "Body is not valid UTF-8")
+    if kind != "application/json":
+        raise TranscriptParseError(415, f"Unsupported content type: {kind}")
+
+    try:
+        payload = _loads(body)
+    except ValueError:
+        raise TranscriptParseError(422, "Body is not valid JSON")
+    if not isinstance(payload, dict):
+        raise TranscriptParseError(422, "Body must be a JSON object")
+    transcript = payload.get("transcript")
+    if not isinstance(transcript, str):
+        raise TranscriptParseError(422, "transcript is required and must be a string")
+    return check_length(transcript)
@@ -0,0 +1,41 @@
+"""
+🔁 Idempotency-Key store for retried POSTs
+✅ Replays the stored response bytes instead of redoing the work
+✅ Keys are scoped per client and bound to a request fingerprint
+✅ Bounded (entries + bytes) with a configurable retention window
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+from result_cache import ResultCache
+
+_FINGERPRINT_LEN = 32  # blake2b-128 hex, as produced by result_cache.content_key
+
+
+class IdempotencyConflict(Exception):
+    """Same Idempotency-Key, different request."""
+
+
+class IdempotencyStore:
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 86400.0):
+        self._cache = ResultCache(max_entries=max_entries, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+
+    def lookup(self, scoped_key: str, fingerprint: str) -> Optional[Tuple[int, bytes]]:
+        """(status, body) of the original response, None if unseen."""
+        record = self._cache.get(scoped_key)
+        if record is None:
+            return None
+        if record[:_FINGERPRINT_LEN].decode("ascii") != fingerprint:
+            raise IdempotencyConflict(scoped_key)
+        status = int(record[_FINGERPRINT_LEN:_FINGERPRINT_LEN + 3])
+        return status, record[_FINGERPRINT_LEN + 3:]
+
+    def store(self, scoped_key: str, fingerprint: str, status: int, body: bytes) -> None:
+        assert len(fingerprint) == _FINGERPRINT_LEN
+        self._cache.put(scoped_key, fingerprint.encode("ascii") + b"%03d" % status + body)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats.pop("rules_version", None)
+        stats["replays"] = stats.pop("hits")
+        return stats
@@ -0,0 +1,344 @@
+"""
+🗂️ Asynchronous SOAP jobs on a durable SQLite (WAL) queue
+✅ POST /jobs returns an id immediately; workers drain the queue in batches
+✅ Leases: jobs left running by a crash are picked up again after restart; live
+   workers keep renewing theirs and only the lease holder may finish a job
+✅ Retries with backoff, then a dead-letter state
+✅ Optional completion webhook (best effort, public addresses or an allowlist only)
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, DEAD = "queued", "running", "done", "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    webhook_url TEXT,
+    result BLOB,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    lease TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+"""
+
+
+class JobStore:
+    def __init__(self, path: str, max_attempts: int = 3, lease_seconds: float = 120.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        if "lease" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN lease TEXT")  # files from before lease tokens
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, transcripts: List[str], webhook_url: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (id, status, payload, webhook_url, max_attempts, available_at, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, json.dumps(transcripts), webhook_url, self.max_attempts, now, now, now),
+        )
+        return job_id
+
+    def claim(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Atomically lease up to `limit` ready jobs (incl. expired leases). Each
+        gets a fresh lease token; a worker whose lease expired and was taken
+        over can no longer renew, complete or fail the job.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, payload, webhook_url, attempts, max_attempts FROM jobs"
+                " WHERE status IN (?, ?) AND available_at <= ? ORDER BY available_at LIMIT ?",
+                (QUEUED, RUNNING, now, limit),
+            ).fetchall()
+            leases = [uuid.uuid4().hex for _ in rows]
+            conn.executemany(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, available_at = ?, updated_at = ?, lease = ?"
+                " WHERE id = ?",
+                [(RUNNING, now + self.lease_seconds, now, lease, r[0]) for r, lease in zip(rows, leases)],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [
+            {
+                "id": r[0], "transcripts": json.loads(r[1]), "webhook_url": r[2], "attempts": r[3] + 1,
+                "max_attempts": r[4], "lease": lease,
+            }
+            for r, lease in zip(rows, leases)
+        ]
+
+    def renew(self, leases: Sequence[Tuple[str, str]]) -> Set[str]:
+        """Push back the expiry of (id, lease) pairs; returns the ids whose lease is still held."""
+        conn = self._conn()
+        until = time.time() + self.lease_seconds
+        held = set()
+        for job_id, lease in leases:
+            cursor = conn.execute(
+                "UPDATE jobs SET available_at = ? WHERE id = ? AND lease = ? AND status = ?",
+                (until, job_id, lease, RUNNING),
+            )
+            if cursor.rowcount:
+                held.add(job_id)
+        return held
+
+    def complete(self, job_id: str, lease: str, result: bytes) -> bool:
+        """False when the lease was lost: another worker owns the job now."""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ?, lease = NULL"
+            " WHERE id = ? AND lease = ? AND status = ?",
+            (DONE, result, time.time(), job_id, lease, RUNNING),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, lease: str, attempts: int, max_attempts: int, error: str) -> Optional[str]:
+        """The job's new status, or None when the lease was lost."""
+        now = time.time()
+        status = DEAD if attempts >= max_attempts else QUEUED
+        retry_at = now + min(60.0, 2.0 ** attempts)
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = ?, error = ?, available_at = ?, updated_at = ?, lease = NULL"
+            " WHERE id = ? AND lease = ? AND status = ?",
+            (status, error, retry_at, now, job_id, lease, RUNNING),
+        )
+        return status if cursor.rowcount == 1 else None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT id, status, attempts, error, result, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0], "status": row[1], "attempts": row[2], "error": row[3],
+            "result": row[4], "created_at": row[5], "updated_at": row[6],
+        }
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+
+def job_json(job: Dict[str, Any]) -> bytes:
+    """Job status document; `result` is spliced in as already-encoded JSON."""
+    head = {k: job[k] for k in ("id", "status", "attempts", "error", "created_at", "updated_at")}
+    text = json.dumps(head, separators=(",", ":"))
+    if job["result"] is None:
+        return text.encode("utf-8")
+    return text[:-1].encode("utf-8") + b',"result":' + bytes(job["result"]) + b"}"
+
+
+class WebhookRejected(ValueError):
+    """The webhook URL points somewhere the server must not send requests."""
+
+
+def _webhook_address(host: str, port: int, allowed_hosts: Collection[str]) -> str:
+    """
+    Resolve `host` once. Unless it is allowlisted, every address it resolves
+    to must be public: no loopback, private, link-local (cloud metadata) or
+    reserved ranges.
+    """
+    import ipaddress
+    import socket
+    infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    if not infos:
+        raise WebhookRejected(f"{host} does not resolve")
+    if host.lower() not in allowed_hosts:
+        for info in infos:
+            address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+            if not address.is_global or address.is_multicast:
+                raise WebhookRejected(f"{host} resolves to non-public address {address}")
+    return infos[0][4][0]
+
+
+def _post_webhook(url: str, body: bytes, timeout: float, allowed_hosts: Collection[str] = ()) -> None:
+    # Lazy: http.client pulls in email; most jobs have no webhook
+    import http.client
+    import socket
+    import urllib.parse
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise WebhookRejected(f"not an http(s) URL: {url}")
+    host = parts.hostname
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    address = _webhook_address(host, port, allowed_hosts)
+    # Connect to the address that was checked, so a second DNS answer cannot redirect us
+    sock = socket.create_connection((address, port), timeout)
+    if parts.scheme == "https":
+        import ssl
+        sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+        conn = http.client.HTTPSConnection(host, port, timeout=timeout)
+    else:
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    conn.sock = sock
+    try:
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        # http.client never follows redirects; a 3xx counts as a failed delivery
+        conn.request("POST", path, body, {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        resp.read()
+        if not 200 <= resp.status < 300:
+            raise OSError(f"webhook answered HTTP {resp.status}")
+    finally:
+        conn.close()
+
+
+class JobWorkers:
+    """Background tasks that lease job batches and run them through `render`."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        render: Callable[[str], Awaitable[bytes]],
+        workers: int = 2,
+        batch_size: int = 8,
+        poll_interval: float = 0.5,
+        webhook_timeout: float = 5.0,
+        webhook_allowed_hosts: Collection[str] = (),
+    ):
+        self.store = store
+        self.render = render
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.webhook_timeout = webhook_timeout
+        self.webhook_allowed_hosts = frozenset(host.lower() for host in webhook_allowed_hosts)
+        # Renew well before expiry, so one slow renewal does not lose the lease
+        self.heartbeat_interval = store.lease_seconds / 3
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._wakeup = asyncio.Event()
+        self.completed = 0
+        self.failed = 0
+        self.lost_leases = 0
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._run(), name=f"soap-job-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """New work was enqueued: skip the rest of the poll sleep."""
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                batch = await asyncio.to_thread(self.store.claim, self.batch_size)
+            except sqlite3.Error:
+                logger.exception("Job claim failed")
+                batch = []
+            if not batch:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            pending = {job["id"]: job["lease"] for job in batch}
+            heartbeat = asyncio.create_task(self._heartbeat(pending))
+            try:
+                for job in batch:
+                    await self._process(job)
+                    pending.pop(job["id"], None)
+            finally:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def _heartbeat(self, pending: Dict[str, str]) -> None:
+        """Keeps the leases of the batch's unfinished jobs alive while earlier ones run."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            leases = list(pending.items())
+            try:
+                held = await asyncio.to_thread(self.store.renew, leases)
+            except sqlite3.Error:
+                logger.exception("Job lease renewal failed")
+                continue
+            for job_id, _ in leases:
+                if job_id not in held and pending.pop(job_id, None) is not None:
+                    logger.warning("Job %s lost its lease; another worker may run it", job_id)
+
+    async def _process(self, job: Dict[str, Any]) -> None:
+        try:
+            notes = [await self.render(t) for t in job["transcripts"]]
+        except Exception as e:
+            self.failed += 1
+            status = await asyncio.to_thread(
+                self.store.fail, job["id"], job["lease"], job["attempts"], job["max_attempts"],
+                f"{type(e).__name__}: {e}",
+            )
+            if status is None:
+                self.lost_leases += 1
+                return
+            logger.warning("Job %s failed (attempt %d): %s -> %s", job["id"], job["attempts"], e, status)
+            if status == DEAD:
+                await self._notify_webhook(job)
+            return
+        result = b"[" + b",".join(notes) + b"]"
+        if not await asyncio.to_thread(self.store.complete, job["id"], job["lease"], result):
+            # The lease expired and the job was claimed again; its new holder reports it
+            self.lost_leases += 1
+            logger.warning("Job %s finished after losing its lease; result dropped", job["id"])
+            return
+        self.completed += 1
+        await self._notify_webhook(job)
+
+    async def _notify_webhook(self, job: Dict[str, Any]) -> None:
+        url = job.get("webhook_url")
+        if not url:
+            return
+        record = await asyncio.to_thread(self.store.get, job["id"])
+        try:
+            await asyncio.to_thread(
+                _post_webhook, url, job_json(record), self.webhook_timeout, self.webhook_allowed_hosts
+            )
+        except Exception as e:
+            logger.warning("Webhook for job %s to %s failed: %s", job["id"], url, e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "completed": self.completed,
+            "failed": self.failed,
+            "lost_leases": self.lost_leases,
+        }
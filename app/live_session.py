@@ -0,0 +1,180 @@
+"""
+🎙️ Incremental SOAP extraction for live dictation
+✅ Keeps per-session scan state: each fragment is scanned, not the whole transcript
+✅ Same rules as SOAPGenerator.generate (shared build step)
+✅ Emits only changed fields as JSON-Patch style "replace" ops
+✅ Bounded inbox per socket: a slow consumer stops us reading (TCP backpressure)
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from soap_generator import KEYWORDS, PATTERNS, SENTENCE_SPLIT, Matches, SOAPGenerator
+
+# Fragments are scanned together with this much preceding text so keywords
+# and values split across fragment boundaries are still found
+_KEYWORD_OVERLAP = max(len(word) for word in KEYWORDS) - 1
+_PATTERN_OVERLAP = 64
+
+
+class LiveSession:
+    """
+    Only a short lowercase tail of the transcript is kept for scanning:
+    keywords, once seen, stay seen, and a pattern's first match is settled
+    as soon as text follows it, so older text never needs a second look.
+    """
+
+    def __init__(self, generator: SOAPGenerator, max_chars: int = 200_000):
+        self.generator = generator
+        self.max_chars = max_chars
+        self._length = 0
+        self._tail = ""  # lowercase text from absolute offset _tail_start
+        self._tail_start = 0
+        self._hits: set = set()
+        self._missing = set(KEYWORDS)
+        self._matches: Matches = {name: None for name in PATTERNS}
+        self._scan_from = {name: 0 for name in PATTERNS}  # absolute offsets, unsettled patterns only
+        self._head = ""  # raw text until the HPI is settled
+        self._hpi = ""
+        self._hpi_final = False
+        self._sent: Optional[Dict[str, Any]] = None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, fragment: str) -> None:
+        if self._length + len(fragment) > self.max_chars:
+            raise ValueError("live transcript too long")
+        self._length += len(fragment)
+        start = self._tail_start + len(self._tail)  # offsets count lowercase chars
+        self._tail += fragment.lower()
+        end = self._tail_start + len(self._tail)
+
+        if self._missing:
+            window = self._tail[max(0, start - _KEYWORD_OVERLAP - self._tail_start):]
+            found = {word for word in self._missing if word in window}
+            self._hits |= found
+            self._missing -= found
+
+        for name, pos in list(self._scan_from.items()):
+            match = PATTERNS[name].search(self._tail, pos - self._tail_start)
+            self._matches[name] = match
+            if match is None:
+                self._scan_from[name] = max(self._tail_start, end - _PATTERN_OVERLAP)
+            elif self._tail_start + match.end() < end:
+                del self._scan_from[name]  # first match is settled
+            else:
+                # Touches the end: the next fragment may still extend it
+                self._scan_from[name] = self._tail_start + match.start()
+
+        keep_from = min([end - _KEYWORD_OVERLAP, *self._scan_from.values()])
+        if keep_from > self._tail_start:
+            self._tail = self._tail[keep_from - self._tail_start:]
+            self._tail_start = keep_from
+
+        if not self._hpi_final:
+            self._head += fragment
+            self._update_hpi()
+
+    def _update_hpi(self) -> None:
+        # Until settled the head is at most two short sentences long
+        sentences = SENTENCE_SPLIT.split(self._head, 2)
+        joined = " ".join(sentences[:2]).strip()
+        self._hpi = self.generator._create_hpi(self._head)
+        # Settled once two full sentences exist or the 200-char cut is reached
+        if len(sentences) > 2 or len(joined) >= 200:
+            self._hpi_final = True
+            self._head = ""
+
+    def note(self) -> Dict[str, Any]:
+        return self.generator.build(self._hpi, self._hits, self._matches)
+
+    def patch(self) -> List[Dict[str, Any]]:
+        """Ops turning the last note handed out into the current one."""
+        current = self.note()
+        ops = diff_note(self._sent or {}, current)
+        self._sent = current
+        return ops
+
+
+def diff_note(old: Dict[str, Any], new: Dict[str, Any], prefix: str = "") -> List[Dict[str, Any]]:
+    ops = []
+    for key, value in new.items():
+        path = f"{prefix}/{key}"
+        before = old.get(key)
+        if isinstance(value, dict) and isinstance(before, dict):
+            ops.extend(diff_note(before, value, path))
+        elif value != before:
+            ops.append({"op": "replace", "path": path, "value": value})
+    return ops
+
+
+_CLOSED = object()
+
+
+async def serve_dictation(websocket: WebSocket, session: LiveSession, idle_timeout: float, queue_size: int) -> None:
+    """
+    Text frames in are transcript fragments; frames out are
+    {"seq": n, "ops": [...]} patches. Fragments that pile up while a patch
+    is being sent are applied together and answered with one patch.
+    """
+    inbox: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=queue_size)
+    close_code = 1000
+    close_reason = ""
+
+    async def reader() -> None:
+        nonlocal close_code, close_reason
+        try:
+            while True:
+                message = await asyncio.wait_for(websocket.receive(), idle_timeout)
+                if message["type"] == "websocket.disconnect":
+                    close_code = 0
+                    return
+                text = message.get("text")
+                if text is None:
+                    close_code, close_reason = 1003, "text frames only"
+                    return
+                # put() blocks while the inbox is full, so we stop reading
+                await inbox.put(text)
+        except asyncio.TimeoutError:
+            close_reason = "idle timeout"
+        except WebSocketDisconnect:
+            close_code = 0
+        finally:
+            # Whatever ended the reader, the consumer must not wait for more;
+            # with the inbox full it sees the reader done once it has drained it
+            try:
+                inbox.put_nowait(_CLOSED)
+            except asyncio.QueueFull:
+                pass
+
+    reader_task = asyncio.create_task(reader())
+    seq = 0
+    try:
+        while True:
+            fragments = [await inbox.get()]
+            while not inbox.empty():
+                fragments.append(inbox.get_nowait())
+            closed = fragments[-1] is _CLOSED or (reader_task.done() and inbox.empty())
+            try:
+                for fragment in fragments:
+                    if fragment is not _CLOSED:
+                        session.append(fragment)
+            except ValueError as e:
+                close_code, close_reason, closed = 1009, str(e), True
+            ops = session.patch()
+            if ops and close_code:
+                seq += 1
+                await websocket.send_text(json.dumps({"seq": seq, "ops": ops}, separators=(",", ":")))
+            if closed:
+                break
+    except WebSocketDisconnect:
+        close_code = 0
+    finally:
+        reader_task.cancel()
+        await asyncio.gather(reader_task, return_exceptions=True)
+    if close_code:
+        await websocket.close(code=close_code, reason=close_reason)
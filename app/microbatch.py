@@ -0,0 +1,96 @@
+"""
+📦 Micro-batching of concurrent model requests
+✅ Collects calls for at most `max_wait` seconds or `max_batch` items, whichever comes first
+✅ Dispatches them together through backend.complete_batch()
+✅ Demultiplexes answers (and errors) back to each waiting caller
+✅ Identical prompts inside one batch are sent once
+"""
+
+import asyncio
+import time
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple
+
+from model_backend import BatchItem, ModelBackend, ModelError
+
+_Item = BatchItem
+
+
+class MicroBatcher:
+    def __init__(self, backend: ModelBackend, max_batch: int = 8, max_wait: float = 0.005):
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[Tuple[_Item, "asyncio.Future[str]"]] = []
+        self._opened = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._dispatching: Set["asyncio.Task[None]"] = set()
+        self.batches = 0
+        self.items = 0
+        self.coalesced = 0
+        self.largest = 0
+        self.waited_ms_total = 0.0
+
+    async def complete(self, prompt: str, system: str = "", required: Collection[str] = ()) -> str:
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[str]" = loop.create_future()
+        if not self._pending:
+            self._opened = time.monotonic()
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        self._pending.append(((prompt, system, tuple(required)), future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.waited_ms_total += (time.monotonic() - self._opened) * 1000
+        task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+        self._dispatching.add(task)
+        task.add_done_callback(self._dispatching.discard)
+
+    async def _dispatch(self, batch: List[Tuple[_Item, "asyncio.Future[str]"]]) -> None:
+        waiters: Dict[_Item, List["asyncio.Future[str]"]] = {}
+        for item, future in batch:
+            waiters.setdefault(item, []).append(future)
+        items = list(waiters)
+        self.batches += 1
+        self.items += len(batch)
+        self.coalesced += len(batch) - len(items)
+        self.largest = max(self.largest, len(batch))
+        try:
+            results: List[Any] = await self.backend.complete_batch(items)
+        except asyncio.CancelledError:
+            # Cancelled mid-flight (shutdown): nobody may be left waiting forever
+            self._resolve(waiters, items, [ModelError("model batch was cancelled")] * len(items))
+            raise
+        except Exception as e:
+            results = [e] * len(items)
+        self._resolve(waiters, items, results)
+
+    @staticmethod
+    def _resolve(waiters: Dict[_Item, List["asyncio.Future[str]"]], items: List[_Item], results: List[Any]) -> None:
+        for item, result in zip(items, results):
+            for future in waiters[item]:
+                if future.done():  # the caller stopped waiting
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "batches": self.batches,
+            "items": self.items,
+            "coalesced": self.coalesced,
+            "largest": self.largest,
+            "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "avg_wait_ms": round(self.waited_ms_total / self.batches, 2) if self.batches else 0.0,
+        }
@@ -0,0 +1,431 @@
+"""
+🤖 Async model backends for SOAP generation (Ollama / OpenAI-compatible)
+✅ One shared httpx.AsyncClient per backend: keep-alive connection pool
+✅ Bounded concurrency: callers queue for a slot, never open extra sockets
+✅ Per-call deadline covers the slot wait and the HTTP exchange
+✅ Async-only API: nothing here can block the event loop
+✅ complete_batch(): several prompts at once, for the micro-batcher
+✅ stream=True: tokens are parsed as they arrive and generation stops once the JSON closes;
+   closed top-level keys can be handed on as they arrive (on_field)
+✅ Prefix reuse: stable system prefix first, prime() at startup, model kept resident;
+   prompt-eval time / time-to-first-token recorded per call
+"""
+
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Collection, Dict, List, Optional, Sequence, Tuple, Union
+
+import httpx  # this module is only imported when a model backend is configured
+
+from stream_json import StreamingJSONObject, StreamParseError
+
+# (prompt, system, required top-level keys) - required lets a stream stop early
+BatchItem = Tuple[str, str, Tuple[str, ...]]
+# Called with (top-level key, value) as a streamed answer closes each key
+OnField = Callable[[str, Any], None]
+
+
+class ModelError(Exception):
+    """The model call failed or returned something unusable."""
+
+
+class ModelTimeout(ModelError):
+    """The per-call deadline expired (waiting for a slot or for the model)."""
+
+
+def _ewma(current: float, sample: float, first: bool) -> float:
+    return sample if first else 0.8 * current + 0.2 * sample
+
+
+class ModelBackend:
+    kind = "base"
+    path = "/"
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        max_concurrency: int = 4,
+        timeout: float = 20.0,
+        keepalive_expiry: float = 30.0,
+        options: Optional[Dict[str, Any]] = None,
+        api_key: str = "",
+        stream: bool = False,
+        transport=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.keepalive_expiry = keepalive_expiry
+        self.options = options or {}
+        self.api_key = api_key
+        self.stream = stream
+        self._transport = transport  # httpx.MockTransport / ASGITransport in checks
+        self._client: Optional[httpx.AsyncClient] = None
+        self._http()  # build the client (SSL context, pool) now, not on the event loop
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.stopped_early = 0
+        self.unparsed = 0
+        self.latency_ewma_ms = 0.0
+        self.usage_samples = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.prompt_eval_ewma_ms = 0.0
+        self.first_tokens = 0
+        self.ttft_ewma_ms = 0.0
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the model in cache keys: a different model is a different note."""
+        return f"{self.kind}:{self.model}"
+
+    def _http(self) -> httpx.AsyncClient:
+        # Recreated after aclose(), so app restarts in one process keep working
+        if self._client is None:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else None
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    def payload(self, prompt: str, system: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def extract(self, data: Dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    def stream_delta(self, line: str) -> Tuple[str, bool, Optional[Dict[str, Any]]]:
+        """(text, finished, message) from one line of the streamed response."""
+        raise NotImplementedError
+
+    def usage(self, data: Dict[str, Any]) -> Tuple[int, int, Optional[float]]:
+        """(prompt tokens evaluated, prompt tokens served from cache, prompt-eval ms) if reported."""
+        return 0, 0, None
+
+    def _record_usage(self, data: Optional[Dict[str, Any]]) -> None:
+        if not data:
+            return
+        prompt_tokens, cached, eval_ms = self.usage(data)
+        self.prompt_tokens += prompt_tokens
+        self.cached_prompt_tokens += cached
+        if eval_ms is not None:
+            self.usage_samples += 1
+            self.prompt_eval_ewma_ms = _ewma(self.prompt_eval_ewma_ms, eval_ms, self.usage_samples == 1)
+
+    def prime_payload(self, system: str, prompt_head: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def prime(self, system: str, prompt_head: str = "") -> Dict[str, Any]:
+        """
+        Load the model and evaluate the static prefix once, so the server's
+        prefix cache already holds it when real traffic arrives.
+        """
+        started = time.monotonic()
+        data = await self._request(self._exchange(self.path, self.prime_payload(system, prompt_head)), None)
+        _, _, eval_ms = self.usage(data)
+        return {
+            "took_ms": round((time.monotonic() - started) * 1000, 1),
+            "prompt_eval_ms": round(eval_ms, 1) if eval_ms is not None else None,
+        }
+
+    async def complete(
+        self,
+        prompt: str,
+        system: str = "",
+        timeout: Optional[float] = None,
+        required: Collection[str] = (),
+        on_field: Optional[OnField] = None,
+    ) -> str:
+        """
+        Model text for `prompt`; raises ModelTimeout / ModelError, never blocks.
+        Streaming returns just the JSON object, as soon as it (or every
+        `required` top-level key) is closed, and passes each top-level key to
+        `on_field` the moment its value closes.
+        """
+        payload = self.payload(prompt, system)
+        if self.stream:
+            payload["stream"] = True
+            return await self._request(self._stream_exchange(self.path, payload, required, on_field), timeout)
+        data = await self._request(self._exchange(self.path, payload), timeout)
+        try:
+            return self.extract(data)
+        except (KeyError, IndexError, TypeError) as e:
+            self.errors += 1
+            raise ModelError(f"{self.model_id}: unexpected response: {e!r}") from e
+
+    async def complete_batch(
+        self, items: Sequence[BatchItem], timeout: Optional[float] = None
+    ) -> List[Union[str, ModelError]]:
+        """
+        One answer (or the ModelError) per (prompt, system, required), in order.
+        Default: all requests go out together, so a server decoding in
+        parallel (OLLAMA_NUM_PARALLEL, llama.cpp --parallel) batches them.
+        """
+        return await asyncio.gather(*(self.complete(p, s, timeout, r) for p, s, r in items), return_exceptions=True)
+
+    async def _request(self, exchange, timeout: Optional[float]) -> Any:
+        started = time.monotonic()
+        try:
+            return await asyncio.wait_for(exchange, timeout or self.timeout)
+        except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+            self.timeouts += 1
+            raise ModelTimeout(f"{self.model_id} timed out after {time.monotonic() - started:.1f}s") from e
+        except httpx.HTTPError as e:
+            self.errors += 1
+            raise ModelError(f"{self.model_id}: {type(e).__name__}: {e}") from e
+        except ValueError as e:
+            self.errors += 1
+            raise ModelError(f"{self.model_id}: malformed response: {e}") from e
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            # A JSON body of the wrong shape (an error event, a list, ...) while streaming or reading usage
+            self.errors += 1
+            raise ModelError(f"{self.model_id}: unexpected response: {e!r}") from e
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+        self.calls += 1
+        self.latency_ewma_ms = _ewma(self.latency_ewma_ms, (time.monotonic() - started) * 1000, self.calls == 1)
+
+    async def _exchange(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._slot():
+            response = await self._http().post(path, json=payload)
+            response.raise_for_status()
+            data = response.json()
+        self._record_usage(data)
+        return data
+
+    async def _stream_exchange(
+        self, path: str, payload: Dict[str, Any], required: Collection[str], on_field: Optional[OnField] = None
+    ) -> str:
+        parser = StreamingJSONObject(max_depth=1)
+        raw: List[str] = []
+        broken = False
+        finished = False
+        async with self._slot():
+            started = time.monotonic()
+            first_token = True
+            # Leaving this block closes the response; the server then stops decoding
+            async with self._http().stream("POST", path, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    text, finished, message = self.stream_delta(line)
+                    if text and first_token:
+                        # Time to first token is prompt evaluation as the client sees it
+                        first_token = False
+                        self.first_tokens += 1
+                        ttft_ms = (time.monotonic() - started) * 1000
+                        self.ttft_ewma_ms = _ewma(self.ttft_ewma_ms, ttft_ms, self.first_tokens == 1)
+                    raw.append(text)
+                    if not broken:
+                        try:
+                            fields = parser.feed(text)
+                        except StreamParseError:
+                            broken = True  # read to the end; the caller's local repair gets the full text
+                        else:
+                            if on_field is not None:
+                                for field_path, value in fields:
+                                    if len(field_path) == 1:
+                                        on_field(field_path[0], value)
+                    if finished:
+                        self._record_usage(message)
+                    if finished or (not broken and parser.complete(required)):
+                        break
+        if broken or not parser.complete(required):
+            # Malformed or cut-short JSON is the caller's to repair or reject, not a transport error
+            self.unparsed += 1
+            return "".join(raw)
+        if not finished:
+            self.stopped_early += 1
+        if parser.done:
+            return parser.text[parser.start:parser.end]
+        return json.dumps(parser.value())
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_id,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "unparsed_streams": self.unparsed,
+            "stream": self.stream,
+            "stopped_early": self.stopped_early,
+            "latency_ewma_ms": round(self.latency_ewma_ms, 1),
+            "time_to_first_token_ewma_ms": round(self.ttft_ewma_ms, 1),
+            "prompt_eval_ewma_ms": round(self.prompt_eval_ewma_ms, 1),
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+        }
+
+
+class OllamaBackend(ModelBackend):
+    """
+    Ollama's runner reuses its KV cache for the longest prompt prefix shared
+    with the previous request, so the system prompt goes first and never
+    changes. `keep_alive` keeps the model loaded between calls. The `context`
+    field is not used: it also carries the previous answer's tokens.
+    """
+
+    kind = "ollama"
+    path = "/api/generate"
+
+    def __init__(self, base_url: str, model: str, keep_alive: str = "30m", **kwargs: Any):
+        super().__init__(base_url, model, **kwargs)
+        self.keep_alive = keep_alive
+
+    def payload(self, prompt: str, system: str) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "model": self.model, "prompt": prompt, "stream": False, "format": "json", "keep_alive": self.keep_alive,
+        }
+        if system:
+            body["system"] = system
+        if self.options:
+            body["options"] = self.options
+        return body
+
+    def prime_payload(self, system: str, prompt_head: str) -> Dict[str, Any]:
+        body = self.payload(prompt_head, system)
+        body["options"] = dict(self.options, num_predict=1)
+        return body
+
+    def extract(self, data: Dict[str, Any]) -> str:
+        return data["response"]
+
+    def stream_delta(self, line: str) -> Tuple[str, bool, Optional[Dict[str, Any]]]:
+        data = json.loads(line)  # NDJSON: {"response": "...", "done": false}
+        return data.get("response", ""), bool(data.get("done")), data
+
+    def usage(self, data: Dict[str, Any]) -> Tuple[int, int, Optional[float]]:
+        # prompt_eval_count only counts tokens that were not already cached
+        duration = data.get("prompt_eval_duration")
+        return int(data.get("prompt_eval_count") or 0), 0, duration / 1e6 if duration is not None else None
+
+
+class OpenAIBackend(ModelBackend):
+    """
+    Any OpenAI-compatible /v1/chat/completions server (llama.cpp, vLLM, LM Studio...).
+    With batch_prompts=True a batch goes out as one /v1/completions call with a
+    list of prompts, which vLLM and llama.cpp decode as a single batch.
+    """
+
+    kind = "openai"
+    path = "/v1/chat/completions"
+    batch_path = "/v1/completions"
+
+    def __init__(
+        self, base_url: str, model: str, batch_prompts: bool = False, prompt_cache_key: str = "", **kwargs: Any
+    ):
+        super().__init__(base_url, model, **kwargs)
+        self.batch_prompts = batch_prompts
+        # Routing hint for OpenAI-style prompt caching; only sent when configured
+        # because strict servers reject unknown parameters
+        self.prompt_cache_key = prompt_cache_key
+
+    def payload(self, prompt: str, system: str) -> Dict[str, Any]:
+        messages: List[Dict[str, str]] = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        body = {
+            "model": self.model,
+            "messages": messages,
+            "response_format": {"type": "json_object"},
+            **self.options,
+        }
+        if self.prompt_cache_key:
+            body["prompt_cache_key"] = self.prompt_cache_key
+        return body
+
+    def prime_payload(self, system: str, prompt_head: str) -> Dict[str, Any]:
+        body = self.payload(prompt_head or ".", system)
+        body["max_tokens"] = 1
+        del body["response_format"]
+        return body
+
+    def extract(self, data: Dict[str, Any]) -> str:
+        return data["choices"][0]["message"]["content"]
+
+    def stream_delta(self, line: str) -> Tuple[str, bool, Optional[Dict[str, Any]]]:
+        if not line.startswith("data:"):
+            return "", False, None  # SSE comments / event names
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return "", True, None
+        message = json.loads(data)
+        if isinstance(message, dict) and message.get("error") is not None:
+            raise ModelError(f"{self.model_id}: server error: {message['error']}")
+        choice = message["choices"][0]
+        return choice.get("delta", {}).get("content") or "", choice.get("finish_reason") is not None, message
+
+    def usage(self, data: Dict[str, Any]) -> Tuple[int, int, Optional[float]]:
+        usage = data.get("usage") or {}
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        timings = data.get("timings") or {}  # llama.cpp server
+        return int(usage.get("prompt_tokens") or 0), int(cached), timings.get("prompt_ms")
+
+    async def complete_batch(
+        self, items: Sequence[BatchItem], timeout: Optional[float] = None
+    ) -> List[Union[str, ModelError]]:
+        if not self.batch_prompts or len(items) < 2:
+            return await super().complete_batch(items, timeout)
+        prompts = [f"{system}\n\n{prompt}" if system else prompt for prompt, system, _ in items]
+        payload = {"model": self.model, "prompt": prompts, **self.options}
+        try:
+            data = await self._request(self._exchange(self.batch_path, payload), timeout)
+            texts: List[Optional[str]] = [None] * len(items)
+            for choice in data["choices"]:
+                texts[choice["index"]] = choice["text"]
+        except ModelError as e:
+            return [e] * len(items)
+        except (KeyError, IndexError, TypeError) as e:
+            self.errors += 1
+            return [ModelError(f"{self.model_id}: unexpected batch response: {e!r}")] * len(items)
+        return [text if text is not None else ModelError(f"{self.model_id}: no choice for prompt") for text in texts]
+
+
+BACKENDS = {"ollama": OllamaBackend, "openai": OpenAIBackend}
+
+
+def create_backend(kind: str, base_url: str, model: str, **kwargs: Any) -> ModelBackend:
+    try:
+        cls = BACKENDS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown model backend {kind!r} (expected one of {', '.join(BACKENDS)})")
+    return cls(base_url, model, **kwargs)
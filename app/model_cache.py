@@ -0,0 +1,167 @@
+"""
+💾 Persistent cache of model outputs
+✅ Keyed by model + parameters + system prompt + prompt (blake2b, 128-bit)
+✅ SQLite file in WAL mode: survives restarts, shared by every worker on the host
+✅ zlib-compressed payloads, LRU eviction once the stored size passes `max_bytes`
+✅ Warm in-memory key index: a miss costs a set lookup, not a query
+✅ Queries run in worker threads (asyncio.to_thread), never on the event loop
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import zlib
+from typing import Any, Collection, Dict, Optional, Set
+
+# Last-access times are only rewritten when older than this, so hits stay read-only
+_TOUCH_EVERY = 60.0
+
+
+class ModelOutputCache:
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, level: int = 6, sync_interval: float = 1.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.level = level
+        self.sync_interval = sync_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS outputs ("
+            "key TEXT NOT NULL UNIQUE, size INTEGER NOT NULL, accessed REAL NOT NULL, payload BLOB NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS outputs_accessed ON outputs (accessed)")
+        self._index: Set[str] = set()
+        self._seen_rowid = 0
+        self._synced_at = 0.0
+        self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM outputs").fetchone()[0]
+        self._sync_index()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import sqlite3
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(model_id: str, options: Dict[str, Any], system: str, prompt: str, required: Collection[str] = ()) -> str:
+        """`required` is part of the key: a streamed call may stop once those fields are complete."""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (model_id, json.dumps(options, sort_keys=True), ",".join(required), system, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def _sync_index(self) -> None:
+        """Pick up keys other processes wrote since the last sync (new rows get higher rowids)."""
+        self._synced_at = time.monotonic()
+        rows = self._conn().execute(
+            "SELECT rowid, key FROM outputs WHERE rowid > ? ORDER BY rowid", (self._seen_rowid,)
+        ).fetchall()
+        with self._lock:
+            for rowid, key in rows:
+                self._index.add(key)
+                self._seen_rowid = max(self._seen_rowid, rowid)
+
+    async def get(self, key: str) -> Optional[str]:
+        if key not in self._index and time.monotonic() - self._synced_at < self.sync_interval:
+            self.misses += 1  # the common miss never leaves the loop
+            return None
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, text: str) -> None:
+        await asyncio.to_thread(self._put, key, text)
+
+    def _get(self, key: str) -> Optional[str]:
+        if key not in self._index:
+            self._sync_index()
+            if key not in self._index:
+                with self._lock:
+                    self.misses += 1
+                return None
+        conn = self._conn()
+        row = conn.execute("SELECT payload, accessed FROM outputs WHERE key = ?", (key,)).fetchone()
+        if row is None:  # evicted by another process
+            with self._lock:
+                self._index.discard(key)
+                self.misses += 1
+            return None
+        now = time.time()
+        if now - row[1] > _TOUCH_EVERY:
+            conn.execute("UPDATE outputs SET accessed = ? WHERE key = ?", (now, key))
+        text = zlib.decompress(row[0]).decode("utf-8")
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def _put(self, key: str, text: str) -> None:
+        raw = text.encode("utf-8")
+        payload = zlib.compress(raw, self.level)
+        conn = self._conn()
+        # REPLACE drops the old row: count only the difference
+        old = conn.execute("SELECT size FROM outputs WHERE key = ?", (key,)).fetchone()
+        cursor = conn.execute(
+            "INSERT OR REPLACE INTO outputs (key, size, accessed, payload) VALUES (?, ?, ?, ?)",
+            (key, len(payload), time.time(), payload),
+        )
+        with self._lock:
+            self._index.add(key)
+            self._seen_rowid = max(self._seen_rowid, cursor.lastrowid or 0)
+            self._bytes += len(payload) - (old[0] if old else 0)
+            self.writes += 1
+            self.raw_bytes += len(raw)
+            self.stored_bytes += len(payload)
+        if self._bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used rows until the file holds at most 90% of `max_bytes`."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Other workers write too: start from the real total, not this process's estimate
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM outputs").fetchone()[0]
+            target = int(self.max_bytes * 0.9)
+            victims = []
+            if total > self.max_bytes:
+                for key, size in conn.execute("SELECT key, size FROM outputs ORDER BY accessed"):
+                    if total <= target:
+                        break
+                    victims.append(key)
+                    total -= size
+                conn.executemany("DELETE FROM outputs WHERE key = ?", [(key,) for key in victims])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._index.difference_update(victims)
+            self._bytes = total
+            self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": len(self._index),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "compression_ratio": round(self.raw_bytes / self.stored_bytes, 2) if self.stored_bytes else None,
+        }
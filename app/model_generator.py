@@ -0,0 +1,420 @@
+"""
+🧠 Model-backed SOAP generation
+✅ hybrid (default): rule engine first, model asked only for fields the rules left at a fallback
+✅ full: the model writes the whole note
+✅ Falls back to the rule engine whenever the model fails or its output cannot be repaired
+✅ Output validated against schemas.SOAPNote; cheap local repair first, a re-prompt only after that
+✅ Records which path served each note (rules / hybrid / model / rules_fallback)
+✅ Prompts are a static prefix (system prompt + PROMPT_HEAD) followed by the per-transcript
+   suffix, so the server's prefix cache is hit on every call; prime() fills it at startup
+✅ Optional circuit breaker (fail fast to rules while open) and hedged calls to a second backend
+✅ Optional persistent cache of parsed-OK model outputs, checked before any of the above
+✅ Optional transcript compaction: the model sees a trimmed transcript, the rules the raw one
+✅ Transcripts over `chunk_tokens` are split into overlapping chunks, prompted concurrently
+   and merged deterministically (map-reduce)
+✅ iter_sections(): sections leave as the model's streamed answer closes them, then any
+   section validation or the fallback changed
+"""
+
+import asyncio
+import copy
+import functools
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Collection, Dict, List, Optional, Tuple
+
+from microbatch import MicroBatcher
+from chunking import LIST_FIELDS, MERGE, merge_fields, split_chunks
+from compaction import TranscriptCompactor, estimate_tokens
+from model_backend import ModelBackend, ModelError, ModelTimeout, OnField
+from model_cache import ModelOutputCache
+from resilience import CircuitBreaker, CircuitOpen, HedgedCompletion
+from soap_generator import FALLBACKS, SOAPGenerator
+from note_validation import NoteValidator, section_conforms
+
+logger = logging.getLogger(__name__)
+
+SOAP_KEYS = ("subjective", "objective", "assessment", "plan", "visit_summary")
+
+# Called with (section, value) whenever a section of the note being generated is known
+OnSection = Callable[[str, Any], None]
+
+# Paths whose note is a stand-in for a model answer that did not happen; never cached
+FALLBACK_PATHS = frozenset({"rules_fallback", "rules_circuit_open"})
+
+SYSTEM_PROMPT = (
+    "You are a clinical documentation assistant. Write a SOAP note for the visit transcript. "
+    "Answer with JSON only, exactly these keys: "
+    '"subjective": {"chief_complaint": str, "hpi": str}, '
+    '"objective": {"vitals": str, "exam": str, "labs": str}, '
+    '"assessment": [str], '
+    '"plan": {"medications": [str], "labs": [str], "follow_up": str}, '
+    '"visit_summary": str. '
+    "Only state what the transcript supports."
+)
+
+FILL_SYSTEM_PROMPT = (
+    "You complete clinical SOAP notes. Fill only the requested fields from the transcript, "
+    "consistent with the fields already extracted. Answer with JSON only: one key per requested "
+    "field, str or [str] as given. Use \"\" or [] when the transcript does not say."
+)
+
+
+# Everything up to here is identical across requests; keep variable text after it
+PROMPT_HEAD = "Transcript:\n"
+
+
+# Appended (after the cached prefix) when an answer could not be parsed or repaired
+REPROMPT_SUFFIX = "\n\nYour previous answer was not valid JSON with the requested keys. Answer with that JSON only:"
+
+
+def build_prompt(transcript: str) -> str:
+    return f"{PROMPT_HEAD}{transcript}\n\nSOAP note JSON:"
+
+
+def get_field(note: Dict[str, Any], path: str) -> Any:
+    section, _, field = path.partition(".")
+    return note[section][field] if field else note[section]
+
+
+def set_field(note: Dict[str, Any], path: str, value: Any) -> None:
+    section, _, field = path.partition(".")
+    if field:
+        note[section][field] = value
+    else:
+        note[section] = value
+
+
+def flatten_note(note: Dict[str, Any]) -> Dict[str, Any]:
+    """{path: value} for every mergeable field present in a model-written note."""
+    flat = {}
+    for path in MERGE:
+        section, _, field = path.partition(".")
+        value = note.get(section)
+        if field:
+            value = value.get(field) if isinstance(value, dict) else None
+        if value is not None:
+            flat[path] = value
+    return flat
+
+
+def unfilled_fields(note: Dict[str, Any]) -> List[str]:
+    """Fields the rules could only answer with their fallback value."""
+    return [path for path, fallback in FALLBACKS.items() if get_field(note, path) == fallback]
+
+
+def build_fill_prompt(transcript: str, note: Dict[str, Any], fields: List[str]) -> str:
+    """Compact targeted prompt: rule findings as context, only the gaps requested."""
+    known = {
+        path: get_field(note, path)
+        for path in ("subjective.chief_complaint", "objective.vitals", "objective.exam", "objective.labs",
+                     "assessment", "plan.medications", "plan.labs", "plan.follow_up")
+        if path not in fields
+    }
+    wanted = {path: "[str]" if isinstance(FALLBACKS[path], list) else "str" for path in fields}
+    return (
+        f"{PROMPT_HEAD}{transcript}\n\n"
+        f"Already extracted:\n{json.dumps(known, separators=(',', ':'))}\n\n"
+        f"Fill:\n{json.dumps(wanted, separators=(',', ':'))}\n\nJSON:"
+    )
+
+
+
+class ModelSOAPGenerator:
+    def __init__(
+        self,
+        backend: ModelBackend,
+        rules: SOAPGenerator,
+        mode: str = "hybrid",
+        batcher: Optional[MicroBatcher] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedger: Optional[HedgedCompletion] = None,
+        cache: Optional[ModelOutputCache] = None,
+        compactor: Optional[TranscriptCompactor] = None,
+        chunk_tokens: int = 0,
+        chunk_overlap: int = 1,
+        reprompts: int = 1,
+    ):
+        if mode not in ("hybrid", "full"):
+            raise ValueError(f"Unknown model mode {mode!r} (expected hybrid or full)")
+        self.backend = backend
+        self.rules = rules
+        self.mode = mode
+        self.batcher = batcher
+        self.breaker = breaker
+        self.hedger = hedger
+        self.cache = cache
+        self.compactor = compactor
+        self.chunk_tokens = chunk_tokens  # 0: never split
+        self.chunk_overlap = chunk_overlap
+        self.max_reprompts = reprompts
+        self.validator = NoteValidator()
+        # hedger wraps the batcher (or backend) call as its primary
+        self._complete = hedger.complete if hedger else batcher.complete if batcher else backend.complete
+        self.served = {"rules": 0, "hybrid": 0, "model": 0, "rules_fallback": 0, "rules_circuit_open": 0}
+        self.fields_total = 0
+        self.fields_requested = 0
+        self.fields_filled = 0
+        self.prompt_chars = 0
+        self.split_notes = 0
+        self.chunks = 0
+        self.chunk_failures = 0
+        self.reprompts = 0
+
+    @property
+    def version(self) -> str:
+        return f"{self.rules.rules_version}+{self.mode}+{self.backend.model_id}"
+
+    @property
+    def system_prompt(self) -> str:
+        return FILL_SYSTEM_PROMPT if self.mode == "hybrid" else SYSTEM_PROMPT
+
+    async def prime(self, timeout: float) -> Dict[str, Any]:
+        """Load the model and cache the static prompt prefix; reports the outcome, never raises."""
+        try:
+            return dict(await asyncio.wait_for(self.backend.prime(self.system_prompt, PROMPT_HEAD), timeout), ok=True)
+        except asyncio.TimeoutError:
+            error: ModelError = ModelTimeout(f"prime took longer than {timeout}s")
+        except ModelError as e:
+            error = e
+        logger.warning("Model prime failed: %s", error)
+        return {"ok": False, "error": str(error)}
+
+    async def generate(self, transcript: str, on_section: Optional[OnSection] = None) -> Tuple[Dict[str, Any], str]:
+        """
+        (note, path): path says who wrote it; "rules_fallback" means the model
+        call failed, "rules_circuit_open" that it was not attempted.
+        `on_section` sees sections early, before validation has the whole
+        answer; the returned note is the one to trust.
+        """
+        if self.mode == "hybrid":
+            return await self._hybrid(transcript, on_section)
+        on_field = None
+        if on_section is not None:
+            def on_field(section: str, value: Any) -> None:
+                if section_conforms(section, value):
+                    on_section(section, value)
+        # Computed at most once, and only if a repair needs to fill missing keys
+        rules_note = functools.lru_cache(maxsize=1)(lambda: self.rules.generate(transcript))
+        try:
+            notes = await self._map(
+                transcript,
+                lambda chunk: build_prompt(chunk),
+                SYSTEM_PROMPT,
+                SOAP_KEYS,
+                lambda text: self.validator.parse_note(text, rules_note),
+                on_field,
+            )
+        except ModelError as e:
+            return self._fallback(transcript, e, rules_note() if rules_note.cache_info().currsize else None)
+        note = notes[0]
+        if len(notes) > 1:
+            for path, value in merge_fields([flatten_note(n) for n in notes], list(MERGE)).items():
+                set_field(note, path, value)
+        self.served["model"] += 1
+        return note, "model"
+
+    async def _hybrid(self, transcript: str, on_section: Optional[OnSection] = None) -> Tuple[Dict[str, Any], str]:
+        note = self.rules.generate(transcript)
+        fields = unfilled_fields(note)
+        self.fields_total += len(FALLBACKS)
+        self.fields_requested += len(fields)
+        if not fields:
+            self.served["rules"] += 1
+            return note, "rules"
+        on_field = None
+        if on_section is not None:
+            waiting = {path.split(".", 1)[0] for path in fields}
+            for section, value in note.items():
+                if section not in waiting:
+                    on_section(section, value)  # complete from the rules alone
+            draft = copy.deepcopy(note)
+
+            def on_field(path: str, value: Any) -> None:
+                if path in fields:
+                    value = self.validator.fill_value(value, path in LIST_FIELDS)
+                    if value is not None:
+                        set_field(draft, path, value)
+                        section = path.split(".", 1)[0]
+                        on_section(section, copy.deepcopy(draft[section]))
+        try:
+            answers = await self._map(
+                transcript,
+                lambda chunk: build_fill_prompt(chunk, note, fields),
+                FILL_SYSTEM_PROMPT,
+                fields,
+                lambda text: self.validator.parse_fill(text, fields, LIST_FIELDS),
+                on_field,
+            )
+        except ModelError as e:
+            return self._fallback(transcript, e, note)
+        filled = answers[0] if len(answers) == 1 else merge_fields(answers, fields)
+        for path, value in filled.items():
+            set_field(note, path, value)
+        self.fields_filled += len(filled)
+        self.served["hybrid"] += 1
+        return note, "hybrid"
+
+    def _prompt_chunks(self, transcript: str) -> List[str]:
+        """
+        The transcript as the model sees it: compacted, then split when over
+        `chunk_tokens`. The token budget applies to each chunk, not to the
+        whole transcript, or a long visit would be cut before it is chunked.
+        """
+        if self.compactor is None:
+            text = transcript
+        else:
+            text = self.compactor.compact(transcript, fit=not self.chunk_tokens).text
+        if self.chunk_tokens and estimate_tokens(text) > self.chunk_tokens:
+            chunks = split_chunks(text, self.chunk_tokens, self.chunk_overlap)
+        else:
+            chunks = [text]
+        if self.compactor is not None and self.chunk_tokens:
+            chunks = [self.compactor.fit(chunk) for chunk in chunks]
+        return chunks
+
+    async def _map(
+        self,
+        transcript: str,
+        build: Callable[[str], str],
+        system: str,
+        required: Collection[str],
+        parse: Callable[[str], Any],
+        on_field: Optional[OnField] = None,
+    ) -> List[Any]:
+        """
+        Parsed answers for `transcript`, one per chunk in chunk order. Chunks run
+        concurrently (backend slots / micro-batches); failed chunks are left
+        out, and only when every chunk failed is the first error raised.
+        `on_field` only sees an unsplit answer: one chunk's fields are not final.
+        """
+        # Compaction is linear but regex-heavy: a maximum-size body costs ~100 ms, so not on the loop
+        chunks = await asyncio.to_thread(self._prompt_chunks, transcript)
+        prompts = [build(chunk) for chunk in chunks]
+        self.prompt_chars += sum(len(prompt) for prompt in prompts)
+        if len(prompts) == 1:
+            return [await self._call(prompts[0], system, required, parse, on_field)]
+        self.split_notes += 1
+        self.chunks += len(prompts)
+        results = await asyncio.gather(
+            *(self._call(prompt, system, required, parse) for prompt in prompts), return_exceptions=True
+        )
+        answers = [result for result in results if not isinstance(result, BaseException)]
+        errors = [result for result in results if isinstance(result, BaseException)]
+        self.chunk_failures += len(errors)
+        for error in errors:
+            if not isinstance(error, ModelError):
+                raise error
+        if not answers:
+            raise errors[0]
+        if errors:
+            logger.warning("%d of %d chunks failed, merging the rest: %s", len(errors), len(prompts), errors[0])
+        return answers
+
+    async def _call(
+        self,
+        prompt: str,
+        system: str,
+        required: Collection[str],
+        parse: Callable[[str], Any],
+        on_field: Optional[OnField] = None,
+    ) -> Any:
+        """
+        Parsed model answer; only answers that parse are written to the cache.
+        Output that local repair cannot fix is asked for again, at most
+        `max_reprompts` times, with a reminder appended after the prompt.
+        With `on_field` the call goes straight to the backend: a batched or
+        hedged answer could not be streamed on.
+        """
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(self.backend.model_id, self.backend.options, system, prompt, required)
+            text = await self.cache.get(key)
+            if text is not None:
+                try:
+                    return parse(text)
+                except ModelError:
+                    pass  # written under older validation rules; ask the model again
+        complete = self._complete if on_field is None else functools.partial(self.backend.complete, on_field=on_field)
+        attempt_prompt = prompt
+        for attempt in range(self.max_reprompts + 1):
+            if self.breaker is None:
+                text = await complete(attempt_prompt, system, required=required)
+            else:
+                async with self.breaker.call():
+                    text = await complete(attempt_prompt, system, required=required)
+            try:
+                parsed = parse(text)
+            except ModelError:
+                if attempt == self.max_reprompts:
+                    raise
+                self.reprompts += 1
+                attempt_prompt = prompt + REPROMPT_SUFFIX
+                continue
+            if key is not None:
+                await self.cache.put(key, text)
+            return parsed
+
+    async def iter_sections(
+        self, transcript: str, served: Optional[Callable[[Dict[str, Any], str], None]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        (section, value) pairs as soon as each is known: in hybrid mode the
+        sections the rules completed first, then sections as the model's
+        streamed answer fills them. Once the note is final every section not
+        sent yet, or sent with a value validation / the fallback changed,
+        follows. `served` gets the final (note, path).
+        """
+        updates: "asyncio.Queue[Optional[Tuple[str, Any]]]" = asyncio.Queue()
+
+        def on_section(section: str, value: Any) -> None:
+            updates.put_nowait((section, value))
+
+        task = asyncio.ensure_future(self.generate(transcript, on_section))
+        task.add_done_callback(lambda _: updates.put_nowait(None))
+        sent: Dict[str, Any] = {}
+        try:
+            while True:
+                update = await updates.get()
+                if update is None:
+                    break
+                sent[update[0]] = update[1]
+                yield update
+            note, path = task.result()
+        finally:
+            task.cancel()  # a no-op once done; stops the model call when the client went away
+        if served is not None:
+            served(note, path)
+        for section, value in note.items():
+            if section not in sent or sent[section] != value:
+                yield section, value
+
+    def _fallback(self, transcript: str, error: ModelError, note=None) -> Tuple[Dict[str, Any], str]:
+        if isinstance(error, CircuitOpen):
+            path = "rules_circuit_open"
+        else:
+            logger.warning("Model generation failed, using rules: %s", error)
+            path = "rules_fallback"
+        self.served[path] += 1
+        return (note if note is not None else self.rules.generate(transcript)), path
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            self.backend.stats(),
+            mode=self.mode,
+            served=dict(self.served),
+            fields={"total": self.fields_total, "requested": self.fields_requested, "filled": self.fields_filled},
+            prompt_chars=self.prompt_chars,
+            batching=self.batcher.stats() if self.batcher else None,
+            breaker=self.breaker.stats() if self.breaker else None,
+            hedging=self.hedger.stats() if self.hedger else None,
+            cache=self.cache.stats() if self.cache else None,
+            compaction=self.compactor.stats() if self.compactor else None,
+            validation=dict(self.validator.stats(), reprompts=self.reprompts),
+            chunking={
+                "chunk_tokens": self.chunk_tokens,
+                "split_notes": self.split_notes,
+                "chunks": self.chunks,
+                "chunk_failures": self.chunk_failures,
+            },
+        )
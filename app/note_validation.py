@@ -0,0 +1,219 @@
+"""
+🩺 Schema validation and bounded local repair of model output
+✅ pydantic TypeAdapter for schemas.SOAPNote built once, at import (startup)
+✅ Fast path: well-formed JSON goes straight through validate_json, no json.loads first
+✅ Repair, in a fixed number of cheap steps: chatter stripped, trailing commas dropped,
+   string <-> list coerced, missing keys filled from the rule engine's note
+✅ Per-note validation / repair time and repair kinds are counted for /metrics
+"""
+
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from pydantic import TypeAdapter, ValidationError
+
+from model_backend import ModelError
+from schemas import SOAPNote
+from stream_json import first_json_object
+
+NOTE_ADAPTER = TypeAdapter(SOAPNote)
+
+# The exact shape clients and soap_encoder's fast path expect; True marks list fields
+NOTE_SHAPE: Dict[str, Any] = {
+    "subjective": {"chief_complaint": False, "hpi": False},
+    "objective": {"vitals": False, "exam": False, "labs": False},
+    "assessment": True,
+    "plan": {"medications": True, "labs": True, "follow_up": False},
+    "visit_summary": False,
+}
+
+_FIELDS = sum(len(spec) if isinstance(spec, dict) else 1 for spec in NOTE_SHAPE.values())
+# Past this many rule-filled fields it is no longer a model note: re-prompt or fall back
+_MAX_FROM_RULES = _FIELDS // 2
+
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+def _as_list(value: Any) -> Optional[List[str]]:
+    if isinstance(value, list):
+        return [item if isinstance(item, str) else str(item) for item in value if item is not None]
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    return None
+
+
+def _as_str(value: Any) -> Optional[str]:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return "; ".join(str(item) for item in value if item is not None)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return None
+
+
+def conforms(note: Any) -> bool:
+    """`note` already has NOTE_SHAPE's keys, in order, with the right value types."""
+    if type(note) is not dict or tuple(note) != tuple(NOTE_SHAPE):
+        return False
+    for section, spec in NOTE_SHAPE.items():
+        value = note[section]
+        if isinstance(spec, dict):
+            if type(value) is not dict or tuple(value) != tuple(spec):
+                return False
+            if any(not _typed(value[field], is_list) for field, is_list in spec.items()):
+                return False
+        elif not _typed(value, spec):
+            return False
+    return True
+
+
+def section_conforms(section: str, value: Any) -> bool:
+    """One top-level section already has its NOTE_SHAPE keys and value types."""
+    spec = NOTE_SHAPE.get(section)
+    if spec is None:
+        return False
+    if isinstance(spec, dict):
+        return (
+            type(value) is dict and tuple(value) == tuple(spec)
+            and all(_typed(value[field], is_list) for field, is_list in spec.items())
+        )
+    return _typed(value, spec)
+
+
+def _typed(value: Any, is_list: bool) -> bool:
+    if is_list:
+        return type(value) is list and all(type(item) is str for item in value)
+    return type(value) is str
+
+
+class NoteValidator:
+    def __init__(self):
+        self.notes = 0
+        self.fast_path = 0
+        self.repaired = 0
+        self.invalid = 0
+        self.repairs = {"chatter": 0, "trailing_commas": 0, "coerced": 0, "filled_from_rules": 0}
+        self.validate_ns = 0
+        self.repair_ns = 0
+        self.fills = 0
+        self.fill_ns = 0
+
+    def load_object(self, text: str) -> Dict[str, Any]:
+        """The first JSON object in `text`, dropping trailing commas if that is what broke it."""
+        try:
+            return first_json_object(text)
+        except ValueError:
+            pass
+        fixed = _TRAILING_COMMA.sub(r"\1", text)
+        if fixed != text:
+            try:
+                data = first_json_object(fixed)
+            except ValueError:
+                pass
+            else:
+                self.repairs["trailing_commas"] += 1
+                return data
+        raise ModelError("model output is not a JSON object")
+
+    def parse_note(self, text: str, rules_note: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        A note with NOTE_SHAPE that validates as schemas.SOAPNote, or
+        ModelError when even the repaired output does not.
+        """
+        self.notes += 1
+        started = time.perf_counter_ns()
+        try:
+            note = NOTE_ADAPTER.validate_json(text).model_dump()
+        except ValidationError:
+            note = None
+        if note is not None and conforms(note):
+            self.fast_path += 1
+            self.validate_ns += time.perf_counter_ns() - started
+            return note
+        try:
+            note = self._repair(text, note, rules_note)
+            NOTE_ADAPTER.validate_python(note)
+        except (ModelError, ValidationError) as e:
+            self.invalid += 1
+            raise ModelError(f"model note failed validation: {e}") from e
+        finally:
+            self.repair_ns += time.perf_counter_ns() - started
+        self.repaired += 1
+        return note
+
+    def _repair(self, text: str, note: Optional[Dict[str, Any]], rules_note: Callable[[], Dict[str, Any]]):
+        if note is None:
+            # validate_json only takes a bare JSON document
+            self.repairs["chatter"] += text.strip()[:1] != "{"
+            note = self.load_object(text)
+        rules: Optional[Dict[str, Any]] = None
+        from_rules = 0
+        repaired: Dict[str, Any] = {}
+        for section, spec in NOTE_SHAPE.items():
+            fields = spec if isinstance(spec, dict) else {None: spec}
+            value = note.get(section)
+            if isinstance(spec, dict):
+                if not isinstance(value, dict):
+                    value = {}
+                repaired[section] = {}
+            for field, is_list in fields.items():
+                raw = value.get(field) if field is not None else value
+                fixed = _as_list(raw) if is_list else _as_str(raw)
+                if fixed is None:
+                    if rules is None:
+                        rules = rules_note()
+                    fixed = rules[section][field] if field is not None else rules[section]
+                    fixed = list(fixed) if is_list else fixed
+                    from_rules += 1
+                elif fixed != raw:
+                    self.repairs["coerced"] += 1
+                if field is None:
+                    repaired[section] = fixed
+                else:
+                    repaired[section][field] = fixed
+        if from_rules > _MAX_FROM_RULES:
+            raise ModelError(f"only {_FIELDS - from_rules} of {_FIELDS} fields usable")
+        self.repairs["filled_from_rules"] += from_rules
+        return repaired
+
+    def parse_fill(self, text: str, fields: Sequence[str], list_fields: Sequence[str]) -> Dict[str, Any]:
+        """Requested fields only; a string where a list belongs becomes a one-item list."""
+        self.fills += 1
+        started = time.perf_counter_ns()
+        data = self.load_object(text)
+        filled = {}
+        for path in fields:
+            value = self.fill_value(data.get(path), path in list_fields)
+            if value is not None:
+                filled[path] = value
+        self.fill_ns += time.perf_counter_ns() - started
+        return filled
+
+    def fill_value(self, value: Any, is_list: bool) -> Any:
+        """A usable answer for one requested field, or None (empty or of the wrong type)."""
+        if is_list:
+            if isinstance(value, str) and value.strip():
+                self.repairs["coerced"] += 1
+                value = [value]
+            if isinstance(value, list) and value and all(isinstance(v, str) and v.strip() for v in value):
+                return [v.strip() for v in value]
+        elif isinstance(value, str) and value.strip():
+            return value.strip()
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        checked = self.fast_path + self.repaired + self.invalid
+        return {
+            "notes": self.notes,
+            "fast_path": self.fast_path,
+            "repaired": self.repaired,
+            "invalid": self.invalid,
+            "repairs": dict(self.repairs),
+            "validate_us_avg": round(self.validate_ns / 1000 / self.fast_path, 1) if self.fast_path else 0.0,
+            "repair_us_avg": round(self.repair_ns / 1000 / (checked - self.fast_path), 1)
+            if checked > self.fast_path else 0.0,
+            "fills": self.fills,
+            "fill_us_avg": round(self.fill_ns / 1000 / self.fills, 1) if self.fills else 0.0,
+        }
@@ -0,0 +1,279 @@
+"""
+🪣 Token-bucket rate limiting per API key (client IP fallback)
+✅ Pure ASGI middleware - a dict lookup and a few float ops per request
+✅ Only configured API keys (stored as SHA-256 digests) get their own bucket
+✅ Weighted cost: bigger transcripts drain more tokens; bodies without a
+   Content-Length are charged as they are read
+✅ Compact in-memory table, LRU-capped, with idle eviction
+✅ Pluggable backend: SQLite file lets several workers share counters (queried off the event loop)
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import threading
+import time
+from typing import Any, Awaitable, Callable, Collection, Dict, Iterable, List, Optional, Tuple
+
+from body_guard import BodyGuard
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+def _spend(tokens: float, cost: float, rate: float, burst: float, force: bool) -> Tuple[bool, float, float]:
+    """(allowed, tokens left, seconds to wait); `force` debits even into debt, down to -burst."""
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    if force:
+        return True, max(tokens - cost, -burst), 0.0
+    return False, tokens, (cost - tokens) / rate
+
+
+class MemoryBackend:
+    """key -> [tokens, last_refill], least recently used first; one process only."""
+
+    blocking = False
+
+    def __init__(self, idle_ttl: float = 600.0, sweep_every: int = 1024, max_entries: int = 100_000):
+        self._buckets: Dict[str, List[float]] = {}
+        self.idle_ttl = idle_ttl
+        self.max_entries = max_entries
+        self._sweep_every = sweep_every
+        self._calls = 0
+        self.evicted = 0
+
+    def take(
+        self, key: str, cost: float, rate: float, burst: float, now: float, force: bool = False
+    ) -> Tuple[bool, float]:
+        self._calls += 1
+        if self._calls >= self._sweep_every:
+            self._calls = 0
+            self.sweep(now)
+        # Re-inserting keeps the dict in least-recently-used order
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            bucket = [burst, now]
+            if len(self._buckets) >= self.max_entries:
+                del self._buckets[next(iter(self._buckets))]
+                self.evicted += 1
+        self._buckets[key] = bucket
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        allowed, bucket[0], wait = _spend(tokens, cost, rate, burst, force)
+        return allowed, wait
+
+    def sweep(self, now: float) -> None:
+        cutoff = now - self.idle_ttl
+        stale = []
+        for k, b in self._buckets.items():
+            if b[1] >= cutoff:
+                break  # LRU order: everything after this was used more recently
+            stale.append(k)
+        for k in stale:
+            del self._buckets[k]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteBackend:
+    """
+    Buckets in a local SQLite file so all workers on a host share them.
+    take() can wait on the file lock, so the limiter calls it from a thread.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, idle_ttl: float = 600.0, sweep_every: int = 1024):
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self._sweep_every = sweep_every
+        self._calls = 0
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, ts REAL) WITHOUT ROWID"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import sqlite3  # only multi-worker deployments pay for this import
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(
+        self, key: str, cost: float, rate: float, burst: float, now: float, force: bool = False
+    ) -> Tuple[bool, float]:
+        conn = self._conn()
+        # Wall clock here: monotonic clocks are not comparable across processes
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, ts FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+            allowed, tokens, wait = _spend(tokens, cost, rate, burst, force)
+            conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (key, tokens, now))
+            self._calls += 1
+            if self._calls >= self._sweep_every:
+                self._calls = 0
+                conn.execute("DELETE FROM buckets WHERE ts < ?", (now - self.idle_ttl,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, wait
+
+
+def client_identity(
+    scope: Scope, headers: Dict[bytes, bytes], trust_forwarded: bool = False, api_keys: Collection[str] = ()
+) -> str:
+    """
+    A known API key (X-API-Key or bearer token, by SHA-256 digest), else
+    client IP. Unknown keys are ignored: any caller could mint fresh ones
+    to get a fresh bucket each time.
+    """
+    if api_keys:
+        presented = headers.get(b"x-api-key")
+        if not presented:
+            auth = headers.get(b"authorization")
+            if auth and auth[:7].lower() == b"bearer ":
+                presented = auth[7:]
+        if presented:
+            digest = hashlib.sha256(presented).hexdigest()
+            if digest in api_keys:
+                return "k:" + digest
+    if trust_forwarded:
+        forwarded = headers.get(b"x-forwarded-for")
+        if forwarded:
+            return "ip:" + forwarded.split(b",", 1)[0].strip().decode("latin-1")
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+def default_cost(scope: Scope, headers: Dict[bytes, bytes], bytes_per_token: int) -> float:
+    """1 token per request plus 1 per `bytes_per_token` of declared body (the rest is metered)."""
+    length = headers.get(b"content-length")
+    size = int(length) if length and length.isdigit() else 0
+    return 1.0 + size // bytes_per_token
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        backend,
+        rate: float,
+        burst: float,
+        paths: Iterable[str],
+        bytes_per_token: int = 1000,
+        trust_forwarded: bool = False,
+        api_keys: Collection[str] = (),
+        cost: Optional[Callable[[Scope, Dict[bytes, bytes], int], float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+        self.paths = frozenset(paths)
+        self.bytes_per_token = bytes_per_token
+        self.trust_forwarded = trust_forwarded
+        self.api_keys = frozenset(api_keys)
+        self.cost = cost or default_cost
+        self._clock = clock
+        self.allowed = 0
+        self.limited = 0
+
+    def applies(self, scope: Scope) -> bool:
+        return scope["type"] == "http" and scope["method"] == "POST" and scope["path"] in self.paths
+
+    def client_key(self, scope: Scope, headers: Dict[bytes, bytes]) -> str:
+        return client_identity(scope, headers, self.trust_forwarded, self.api_keys)
+
+    async def _take(self, key: str, cost: float, force: bool = False) -> Tuple[bool, float]:
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.backend.take, key, cost, self.rate, self.burst, self._clock(), force)
+        return self.backend.take(key, cost, self.rate, self.burst, self._clock(), force)
+
+    async def check(self, scope: Scope, receive: Receive) -> Tuple[float, Receive]:
+        """
+        (0.0 if the request may proceed, else seconds until it could; the
+        receive to read the body with). A body without a Content-Length is
+        charged for its size as it is read, after the request was let in.
+        """
+        headers = dict(scope["headers"])
+        key = self.client_key(scope, headers)
+        # Oversize bodies are the body guard's job: never charge above burst
+        cost = min(self.cost(scope, headers, self.bytes_per_token), self.burst)
+        allowed, wait = await self._take(key, cost)
+        if not allowed:
+            self.limited += 1
+            return wait, receive
+        self.allowed += 1
+        if b"content-length" in headers:
+            return 0.0, receive
+        return 0.0, self._metered(key, receive)
+
+    def _metered(self, key: str, receive: Receive) -> Receive:
+        read = 0
+
+        async def metered() -> Dict[str, Any]:
+            nonlocal read
+            message = await receive()
+            if message["type"] == "http.request":
+                read += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    extra = min(read // self.bytes_per_token, self.burst)
+                    if extra:
+                        # Already admitted: the debt makes this client's next requests wait
+                        await self._take(key, extra, force=True)
+            return message
+
+        return metered
+
+    def stats(self) -> Dict[str, Any]:
+        out = {"allowed": self.allowed, "limited": self.limited}
+        if isinstance(self.backend, MemoryBackend):
+            out["tracked_clients"] = len(self.backend)
+            out["evicted_clients"] = self.backend.evicted
+        return out
+
+
+_LIMITED_BODY = json.dumps({"detail": "Rate limit exceeded"}).encode()
+
+
+async def send_rate_limited(send, wait: float) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(_LIMITED_BODY)).encode()),
+            (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": _LIMITED_BODY})
+
+
+class RateLimitMiddleware:
+    """`guard`: bodies its header check refuses (413/415) get that answer here, uncharged."""
+
+    def __init__(self, app, limiter: RateLimiter, guard: Optional[BodyGuard] = None):
+        self.app = app
+        self.limiter = limiter
+        self.guard = guard
+
+    async def __call__(self, scope: Scope, receive, send) -> None:
+        if self.limiter.applies(scope):
+            rule = self.guard.rule_for(scope) if self.guard is not None else None
+            if rule is not None and await self.guard.refused(scope, send, rule):
+                return
+            wait, receive = await self.limiter.check(scope, receive)
+            if wait:
+                await send_rate_limited(send, wait)
+                return
+        await self.app(scope, receive, send)
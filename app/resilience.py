@@ -0,0 +1,203 @@
+"""
+🛡️ Circuit breaker and hedged requests for the model backend
+✅ Breaker opens on error rate or slow-call rate over a rolling window of calls
+✅ While open, callers fail fast (CircuitOpen) instead of waiting out the timeout
+✅ Half-open: a few probe calls decide whether to close again or re-open
+✅ Hedging: a second backend is asked only when the first is slower than its recent p95
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Collection, Deque, Dict, Optional, Tuple
+
+from model_backend import ModelError
+
+Complete = Callable[..., Awaitable[str]]
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(ModelError):
+    """The breaker is open: the model is not called at all."""
+
+
+class CircuitBreaker:
+    """
+    Count-based breaker over the last `window` calls. It opens when at least
+    `min_calls` were seen and the failure rate or the rate of calls slower
+    than `slow_call` seconds reaches its threshold. After `open_seconds` up to
+    `half_open_probes` calls are let through; one failed or slow probe
+    re-opens it, all probes succeeding closes it.
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call: float = 5.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 15.0,
+        half_open_probes: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)  # (failed, slow)
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probes_ok = 0
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if self._clock() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self.state, self._probes, self._probes_ok = HALF_OPEN, 0, 0
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                self.rejected += 1
+                return False
+            self._probes += 1
+        return True
+
+    def record(self, failed: bool, elapsed: float) -> None:
+        slow = elapsed >= self.slow_call
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._open()
+            else:
+                self._probes_ok += 1
+                if self._probes_ok >= self.half_open_probes:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+            return
+        if self.state == OPEN:
+            return  # a call admitted before the breaker opened
+        self._outcomes.append((failed, slow))
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failures = sum(1 for f, _ in self._outcomes if f)
+        slows = sum(1 for _, s in self._outcomes if s)
+        if failures / calls >= self.failure_rate or slows / calls >= self.slow_call_rate:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self.opened += 1
+
+    @asynccontextmanager
+    async def call(self) -> AsyncIterator[None]:
+        """Guards one model call; raises CircuitOpen without running it when not allowed."""
+        if not self.allow():
+            raise CircuitOpen("model circuit is open")
+        started = self._clock()
+        failed: Optional[bool] = None
+        try:
+            yield
+            failed = False
+        except Exception:
+            failed = True  # not only ModelError: any crash of the call is a failed call
+            raise
+        finally:
+            if failed is not None:
+                self.record(failed, self._clock() - started)
+            elif self.state == HALF_OPEN:
+                self._probes -= 1  # cancelled: the probe never finished; let another one through
+
+    def stats(self) -> Dict[str, Any]:
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "window_failures": sum(1 for f, _ in self._outcomes if f),
+            "window_slow": sum(1 for _, s in self._outcomes if s),
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class HedgedCompletion:
+    """
+    Sends a call to `primary`; if it has not answered after the p95 of its
+    recent successful latencies (never less than `min_delay`), the same call
+    also goes to `secondary` and the first good answer wins. The loser is
+    cancelled. Until `min_samples` latencies are known, `min_delay` is used.
+    """
+
+    def __init__(
+        self,
+        primary: Complete,
+        secondary: Complete,
+        min_delay: float = 0.05,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        self.primary = primary
+        self.secondary = secondary
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def delay(self) -> float:
+        if len(self._latencies) < self.min_samples:
+            return self.min_delay
+        ordered = sorted(self._latencies)
+        return max(self.min_delay, ordered[int(0.95 * (len(ordered) - 1))])
+
+    async def complete(self, prompt: str, system: str = "", required: Collection[str] = ()) -> str:
+        self.calls += 1
+        started = time.monotonic()
+        first = asyncio.ensure_future(self.primary(prompt, system, required=required))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.delay())
+            if done:
+                return self._primary_result(first, started)
+            self.hedged += 1
+            second = asyncio.ensure_future(self.secondary(prompt, system, required=required))
+            pending.add(second)
+            error: BaseException = ModelError("hedged call produced no result")
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif task is second:
+                        self.hedge_wins += 1
+                        return task.result()
+                    else:
+                        return self._primary_result(task, started)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _primary_result(self, task: "asyncio.Future[str]", started: float) -> str:
+        result = task.result()  # re-raises the primary's error
+        self._latencies.append(time.monotonic() - started)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "delay_ms": round(self.delay() * 1000, 1),
+        }
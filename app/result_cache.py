@@ -0,0 +1,123 @@
+"""
+⚡ Content-hash result cache for generated SOAP notes
+✅ Keyed by normalized transcript + rule-set version (blake2b, 128-bit)
+✅ LRU eviction bounded by entry count AND total bytes
+✅ TTL expiry + automatic invalidation when the rule-set version changes
+✅ Stores pre-serialized JSON bytes so a hit skips extraction and encoding
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def normalize_transcript(transcript: str) -> str:
+    """Only strip the edges: inner whitespace still shapes the HPI text."""
+    return transcript.strip()
+
+
+def content_key(transcript: str, rules_version: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(rules_version.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(normalize_transcript(transcript).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def ensure_version(self, rules_version: str) -> None:
+        """Drop everything when the rules were reloaded under a new version."""
+        if rules_version == self._version:
+            return
+        with self._lock:
+            if self._version is not None and rules_version != self._version:
+                self._clear_locked()
+                self.invalidations += 1
+            self._version = rules_version
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, body = entry
+            if expires_at <= self._clock():
+                self._remove_locked(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: str, body: bytes) -> None:
+        size = self._entry_size(key, body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = (self._clock() + self.ttl_seconds, body)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove_locked(oldest)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._clear_locked()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "rules_version": self._version,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _entry_size(key: str, body: bytes) -> int:
+        return len(key) + len(body)
+
+    def _remove_locked(self, key: str) -> None:
+        _, body = self._entries.pop(key)
+        self._bytes -= self._entry_size(key, body)
+
+    def _clear_locked(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
@@ -1,8 +1,19 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import Annotated, List, Dict, Any, Optional
+
+TRANSCRIPT_MIN_LENGTH = 20
+TRANSCRIPT_MAX_LENGTH = 10000
 
 class TranscriptInput(BaseModel):
-    transcript: str = Field(..., min_length=20, max_length=10000)
+    transcript: str = Field(..., min_length=TRANSCRIPT_MIN_LENGTH, max_length=TRANSCRIPT_MAX_LENGTH)
+
+JOB_MAX_TRANSCRIPTS = 100
+
+class JobRequest(BaseModel):
+    transcripts: List[Annotated[str, Field(min_length=TRANSCRIPT_MIN_LENGTH, max_length=TRANSCRIPT_MAX_LENGTH)]] = Field(
+        ..., min_length=1, max_length=JOB_MAX_TRANSCRIPTS
+    )
+    webhook_url: Optional[str] = Field(None, pattern=r"^https?://")
 
 class SOAPNote(BaseModel):
     subjective: Dict[str, str]
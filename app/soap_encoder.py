@@ -0,0 +1,84 @@
+"""
+🧾 Specialized JSON encoder for the fixed SOAP response shape
+✅ Precomputed key fragments, C-escaped string fields, one utf-8 encode
+✅ No jsonable_encoder walk, no generic json.dumps dispatch
+✅ Falls back to json.dumps for anything that is not the known shape
+"""
+
+import json
+from json.encoder import encode_basestring
+from typing import Any, Dict, List
+
+from fastapi.responses import Response
+
+_q = encode_basestring  # C accelerated, same escaping as ensure_ascii=False
+
+_NOTE_KEYS = ("subjective", "objective", "assessment", "plan", "visit_summary")
+_SUBJECTIVE_KEYS = ("chief_complaint", "hpi")
+_OBJECTIVE_KEYS = ("vitals", "exam", "labs")
+_PLAN_KEYS = ("medications", "labs", "follow_up")
+
+_OPEN_CC = '{"subjective":{"chief_complaint":'
+_HPI = ',"hpi":'
+_OPEN_VITALS = '},"objective":{"vitals":'
+_EXAM = ',"exam":'
+_LABS = ',"labs":'
+_ASSESSMENT = '},"assessment":'
+_OPEN_MEDS = ',"plan":{"medications":'
+_FOLLOW_UP = ',"follow_up":'
+_SUMMARY = '},"visit_summary":'
+
+
+def encode_generic(note: Any) -> bytes:
+    # Same compact encoding FastAPI's JSONResponse produces
+    return json.dumps(note, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _str_list(items: List[str]) -> str:
+    if type(items) is not list:
+        raise TypeError("expected list")
+    return "[" + ",".join(map(_q, items)) + "]"
+
+
+def _is_known_shape(note: Dict[str, Any]) -> bool:
+    try:
+        return (
+            tuple(note) == _NOTE_KEYS
+            and tuple(note["subjective"]) == _SUBJECTIVE_KEYS
+            and tuple(note["objective"]) == _OBJECTIVE_KEYS
+            and tuple(note["plan"]) == _PLAN_KEYS
+        )
+    except (KeyError, TypeError):
+        return False
+
+
+def encode_soap(note: Dict[str, Any]) -> bytes:
+    """Encode a SOAP note dict to the exact bytes json.dumps would produce."""
+    if type(note) is not dict or not _is_known_shape(note):
+        return encode_generic(note)
+    s = note["subjective"]
+    o = note["objective"]
+    p = note["plan"]
+    try:
+        text = "".join((
+            _OPEN_CC, _q(s["chief_complaint"]), _HPI, _q(s["hpi"]),
+            _OPEN_VITALS, _q(o["vitals"]), _EXAM, _q(o["exam"]), _LABS, _q(o["labs"]),
+            _ASSESSMENT, _str_list(note["assessment"]),
+            _OPEN_MEDS, _str_list(p["medications"]), _LABS, _str_list(p["labs"]),
+            _FOLLOW_UP, _q(p["follow_up"]),
+            _SUMMARY, _q(note["visit_summary"]), "}",
+        ))
+    except TypeError:
+        # Non-string field (e.g. model output) - let json handle it
+        return encode_generic(note)
+    return text.encode("utf-8")
+
+
+class SOAPJSONResponse(Response):
+    """Response for SOAP notes: accepts a note dict or pre-encoded bytes."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return encode_soap(content)
@@ -6,130 +6,181 @@
 """
 
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+
+# Bump whenever extraction rules change: cached notes are keyed on it
+RULES_VERSION = "2025.1"
+
+# Every keyword the rules below probe for (substring match on lowercased text)
+KEYWORDS = (
+    "chest", "pain", "pressure", "fever", "cough", "sputum", "diabetes", "sugar",
+    "glucose", "hba1c", "a1c", "seizure", "checkup", "routine", "st elevation",
+    "diaphoretic", "normal", "within normal", "unremarkable", "cholesterol",
+    "elevated", "troponin", "consolidation",
+)
+
+# First match of each pattern is used; lab order is the order labs are listed
+VITAL_PATTERNS = {
+    "bp": re.compile(r'(?:bp|blood pressure|bp:)\s*(\d{2,3})[/-](\d{2,3})'),
+    "hr": re.compile(r'(?:hr|pulse|heart rate)\s*(\d{2,3})'),
+}
+LAB_PATTERNS = {
+    "hba1c": re.compile(r'(?:hba1c|a1c)\s*[:\-]?\s*([\d.]+)', re.IGNORECASE),  # HbA1c 7.8, HbA1c: 7.8
+    "troponin": re.compile(r'troponin\s*[:\-]?\s*([\d.]+)', re.IGNORECASE),
+    "wbc": re.compile(r'wbc\s*[:\-]?\s*([\d.]+)', re.IGNORECASE),
+    "glucose": re.compile(r'(?:bg|glucose)\s*[:\-]?\s*(\d+)', re.IGNORECASE),
+    "cholesterol": re.compile(r'(?:cholesterol|chol)\s*[:\-]?\s*([\d.]+)', re.IGNORECASE),
+}
+PATTERNS = {**VITAL_PATTERNS, **LAB_PATTERNS}
+SENTENCE_SPLIT = re.compile(r'[.!?]+')
+
+# What each field falls back to when no rule fired (hybrid mode asks a model for these)
+FALLBACKS: Dict[str, Any] = {
+    "subjective.chief_complaint": "Clinical evaluation",
+    "objective.vitals": "Vital signs stable",
+    "objective.exam": "General exam unremarkable",
+    "objective.labs": "Pending laboratory results",
+    "assessment": ["Clinical correlation needed"],
+    "plan.medications": [],
+    "plan.labs": ["Repeat testing as indicated"],
+    "plan.follow_up": "Return if symptoms worsen",
+    "visit_summary": "Clinical evaluation - evaluation completed",
+}
+
+Matches = Dict[str, Optional["re.Match[str]"]]
+
+def find_keywords(transcript_lower: str) -> Set[str]:
+    return {word for word in KEYWORDS if word in transcript_lower}
+
+def find_patterns(transcript_lower: str) -> Matches:
+    return {name: pattern.search(transcript_lower) for name, pattern in PATTERNS.items()}
 
 class SOAPGenerator:
     def __init__(self):
-        pass
+        self.rules_version = RULES_VERSION
     
     def generate(self, transcript: str) -> Dict[str, Any]:
         """🏥 Production-ready clinical SOAP extraction"""
+        return dict(self.iter_sections(transcript))
+    
+    def iter_sections(self, transcript: str) -> Iterator[Tuple[str, Any]]:
+        """(section, value) pairs in note order, each produced as soon as it is ready"""
         transcript_lower = transcript.lower()
-        
-        return {
-            "subjective": {
-                "chief_complaint": self._extract_chief_complaint(transcript_lower),
-                "hpi": self._create_hpi(transcript)
-            },
-            "objective": {
-                "vitals": self._extract_vitals(transcript_lower),
-                "exam": self._extract_exam(transcript_lower),
-                "labs": self._extract_labs(transcript_lower)
-            },
-            "assessment": self._generate_assessment(transcript_lower),
-            "plan": {
-                "medications": self._generate_meds(transcript_lower),
-                "labs": self._generate_pending_labs(transcript_lower),
-                "follow_up": self._generate_followup(transcript_lower)
-            },
-            "visit_summary": self._create_summary(transcript)
+        return self.build_sections(
+            self._create_hpi(transcript),
+            find_keywords(transcript_lower),
+            find_patterns(transcript_lower),
+        )
+    
+    def build(self, hpi: str, hits: Set[str], matches: Matches) -> Dict[str, Any]:
+        """Assemble the note from scanned findings (shared with live dictation)"""
+        return dict(self.build_sections(hpi, hits, matches))
+    
+    def build_sections(self, hpi: str, hits: Set[str], matches: Matches) -> Iterator[Tuple[str, Any]]:
+        chief = self._extract_chief_complaint(hits)
+        yield "subjective", {
+            "chief_complaint": chief,
+            "hpi": hpi
         }
+        yield "objective", {
+            "vitals": self._extract_vitals(matches),
+            "exam": self._extract_exam(hits),
+            "labs": self._extract_labs(hits, matches)
+        }
+        yield "assessment", self._generate_assessment(hits)
+        yield "plan", {
+            "medications": self._generate_meds(hits),
+            "labs": self._generate_pending_labs(hits),
+            "follow_up": self._generate_followup(hits)
+        }
+        yield "visit_summary", self._create_summary(chief)
     
-    def _extract_chief_complaint(self, transcript_lower: str) -> str:
-        if any(word in transcript_lower for word in ["chest", "pain", "pressure"]):
+    def _extract_chief_complaint(self, hits: Set[str]) -> str:
+        if any(word in hits for word in ["chest", "pain", "pressure"]):
             return "Chest pain"
-        elif any(word in transcript_lower for word in ["fever", "cough", "sputum"]):
+        elif any(word in hits for word in ["fever", "cough", "sputum"]):
             return "Fever and cough"
-        elif any(word in transcript_lower for word in ["diabetes", "sugar", "glucose", "hba1c", "a1c"]):
+        elif any(word in hits for word in ["diabetes", "sugar", "glucose", "hba1c", "a1c"]):
             return "Diabetes management"
-        elif "seizure" in transcript_lower:
+        elif "seizure" in hits:
             return "Seizure"
-        elif any(word in transcript_lower for word in ["checkup", "routine"]):
+        elif any(word in hits for word in ["checkup", "routine"]):
             return "Routine checkup"
-        return "Clinical evaluation"
+        return FALLBACKS["subjective.chief_complaint"]
     
     def _create_hpi(self, transcript: str) -> str:
-        sentences = re.split(r'[.!?]+', transcript)
+        sentences = SENTENCE_SPLIT.split(transcript)
         hpi = ' '.join(sentences[:2]).strip()
         return hpi[:200] + "..." if len(hpi) > 197 else hpi
     
-    def _extract_vitals(self, transcript_lower: str) -> str:
+    def _extract_vitals(self, matches: Matches) -> str:
         vitals = []
-        bp_match = re.search(r'(?:bp|blood pressure|bp:)\s*(\d{2,3})[/-](\d{2,3})', transcript_lower)
+        bp_match = matches["bp"]
         if bp_match:
             vitals.append(f"BP {bp_match.group(1)}/{bp_match.group(2)}")
-        hr_match = re.search(r'(?:hr|pulse|heart rate)\s*(\d{2,3})', transcript_lower)
+        hr_match = matches["hr"]
         if hr_match:
             vitals.append(f"HR {hr_match.group(1)}")
-        return ", ".join(vitals) or "Vital signs stable"
+        return ", ".join(vitals) or FALLBACKS["objective.vitals"]
     
-    def _extract_exam(self, transcript_lower: str) -> str:
-        if "st elevation" in transcript_lower:
+    def _extract_exam(self, hits: Set[str]) -> str:
+        if "st elevation" in hits:
             return "ECG: ST elevation V2-V4"
-        elif "diaphoretic" in transcript_lower:
+        elif "diaphoretic" in hits:
             return "Diaphoretic, ill-appearing"
-        elif any(word in transcript_lower for word in ["normal", "within normal", "unremarkable"]):
+        elif any(word in hits for word in ["normal", "within normal", "unremarkable"]):
             return "General physical examination within normal limits"
-        return "General exam unremarkable"
+        return FALLBACKS["objective.exam"]
     
-    def _extract_labs(self, transcript_lower: str) -> str:
+    def _extract_labs(self, hits: Set[str], matches: Matches) -> str:
         """🚀 PRODUCTION-FIXED: Catches HbA1c 7.8 + cholesterol elevated"""
         labs = []
         
         # Numbers with labels
-        patterns = [
-            r'(?:hba1c|a1c)\s*[:\-]?\s*([\d.]+)',  # HbA1c 7.8, HbA1c: 7.8
-            r'troponin\s*[:\-]?\s*([\d.]+)',
-            r'wbc\s*[:\-]?\s*([\d.]+)',
-            r'(?:bg|glucose)\s*[:\-]?\s*(\d+)',
-            r'(?:cholesterol|chol)\s*[:\-]?\s*([\d.]+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, transcript_lower, re.IGNORECASE)
+        for name in LAB_PATTERNS:
+            match = matches[name]
             if match:
                 labs.append(f"{match.group(0).title()}: {match.group(1)}")
         
         # Text-only: "cholesterol elevated"
-        if "cholesterol" in transcript_lower and "elevated" in transcript_lower:
+        if "cholesterol" in hits and "elevated" in hits:
             labs.append("Cholesterol: Elevated")
         
-        return ", ".join(labs) or "Pending laboratory results"
+        return ", ".join(labs) or FALLBACKS["objective.labs"]
     
-    def _generate_assessment(self, transcript_lower: str) -> List[str]:
+    def _generate_assessment(self, hits: Set[str]) -> List[str]:
         assessments = []
         
-        if any(word in transcript_lower for word in ["chest", "pressure", "st elevation", "troponin"]):
+        if any(word in hits for word in ["chest", "pressure", "st elevation", "troponin"]):
             assessments.extend(["Acute coronary syndrome", "STEMI vs NSTEMI"])
-        elif any(word in transcript_lower for word in ["fever", "cough", "consolidation"]):
+        elif any(word in hits for word in ["fever", "cough", "consolidation"]):
             assessments.extend(["Community-acquired pneumonia", "Acute respiratory infection"])
-        elif any(word in transcript_lower for word in ["hba1c", "a1c"]):
+        elif any(word in hits for word in ["hba1c", "a1c"]):
             assessments.extend(["Prediabetes/Diabetes mellitus", "Suboptimal glycemic control"])
-        elif "cholesterol" in transcript_lower:
+        elif "cholesterol" in hits:
             assessments.extend(["Dyslipidemia", "Elevated cholesterol levels"])
-        elif any(word in transcript_lower for word in ["checkup", "routine"]):
+        elif any(word in hits for word in ["checkup", "routine"]):
             assessments.append("Routine health maintenance")
         else:
-            assessments.append("Clinical correlation needed")
+            assessments.extend(FALLBACKS["assessment"])
         
         return assessments[:2]
     
-    def _generate_meds(self, transcript_lower: str) -> List[str]:
-        if any(word in transcript_lower for word in ["chest", "pain"]):
+    def _generate_meds(self, hits: Set[str]) -> List[str]:
+        if any(word in hits for word in ["chest", "pain"]):
             return ["Aspirin 325mg stat", "Nitroglycerin 0.4mg SL PRN"]
-        return []  # Routine checkups = diet/lifestyle only
+        return list(FALLBACKS["plan.medications"])  # Routine checkups = diet/lifestyle only
     
-    def _generate_pending_labs(self, transcript_lower: str) -> List[str]:
-        pending = ["Repeat testing as indicated"]
-        if any(word in transcript_lower for word in ["hba1c", "a1c"]):
+    def _generate_pending_labs(self, hits: Set[str]) -> List[str]:
+        pending = list(FALLBACKS["plan.labs"])
+        if any(word in hits for word in ["hba1c", "a1c"]):
             pending.insert(0, "Repeat HbA1c in 3 months")
         return pending
     
-    def _generate_followup(self, transcript_lower: str) -> str:
-        if any(word in transcript_lower for word in ["hba1c", "cholesterol"]):
+    def _generate_followup(self, hits: Set[str]) -> str:
+        if any(word in hits for word in ["hba1c", "cholesterol"]):
             return "Follow-up in 3 months for repeat labs"
-        return "Return if symptoms worsen"
+        return FALLBACKS["plan.follow_up"]
     
-    def _create_summary(self, transcript: str) -> str:
-        chief = self._extract_chief_complaint(transcript.lower())
+    def _create_summary(self, chief: str) -> str:
         return f"{chief} - evaluation completed"
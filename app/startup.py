@@ -0,0 +1,46 @@
+"""
+⏱️ Startup timeline
+✅ Marks each startup phase (imports, app wiring, subsystems, warmup, ready)
+✅ Includes interpreter/server boot time before our first import (Linux /proc)
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def process_age_seconds() -> Optional[float]:
+    """Seconds since this process started, from /proc (None elsewhere)."""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        # starttime is field 22 overall, i.e. index 19 after "pid (comm)"
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupTimeline:
+    def __init__(self, origin: Optional[float] = None):
+        self.origin = time.perf_counter() if origin is None else origin
+        age = process_age_seconds()
+        # Clock ticks are coarse (10 ms); good enough to show interpreter boot
+        self.before_import_ms = round(max(0.0, age - (time.perf_counter() - self.origin)) * 1000, 1) if age else None
+        self.marks: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        self.marks.append((phase, time.perf_counter() - self.origin))
+
+    def report(self) -> Dict[str, Any]:
+        phases = []
+        previous = 0.0
+        for phase, at in self.marks:
+            phases.append({"phase": phase, "at_ms": round(at * 1000, 2), "took_ms": round((at - previous) * 1000, 2)})
+            previous = at
+        return {
+            "before_app_import_ms": self.before_import_ms,
+            "phases": phases,
+            "total_ms": round(previous * 1000, 2),
+        }
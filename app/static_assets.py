@@ -0,0 +1,75 @@
+"""
+📦 In-memory, pre-compressed static assets
+✅ Read once at startup, gzipped once (never per request)
+✅ Strong ETags per representation + If-None-Match -> 304
+✅ Cache-Control: no-cache by default, so browsers revalidate (cheap 304) and see deploys at once
+✅ gzip only when Accept-Encoding allows it (q=0 refuses)
+"""
+
+import gzip
+import hashlib
+from typing import Mapping
+
+from fastapi.responses import Response
+
+
+def etag_matches(if_none_match: str, *etags: str, wildcard: bool = True) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it).
+
+    `wildcard=False` compares concrete tags only, for representations that may not exist yet.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return wildcard
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in etags:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """gzip (or `*`) listed in Accept-Encoding with a non-zero q."""
+    star = False
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding in ("gzip", "x-gzip"):
+            return q > 0  # an explicit entry beats `*`
+        if coding == "*":
+            star = q > 0
+    return star
+
+
+class StaticAsset:
+    def __init__(self, path: str, media_type: str, max_age: int = 0):
+        with open(path, "rb") as f:
+            self.body = f.read()
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.media_type = media_type
+        digest = hashlib.blake2b(self.body, digest_size=12).hexdigest()
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+        self.cache_control = f"public, max-age={max_age}" if max_age > 0 else "public, no-cache"
+
+    def response(self, headers: Mapping[str, str]) -> Response:
+        use_gzip = accepts_gzip(headers.get("accept-encoding", ""))
+        etag = self.gzip_etag if use_gzip else self.etag
+        out = {"ETag": etag, "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if etag_matches(headers.get("if-none-match", ""), self.etag, self.gzip_etag):
+            return Response(status_code=304, headers=out)
+        if use_gzip:
+            out["Content-Encoding"] = "gzip"
+            return Response(self.gzip_body, media_type=self.media_type, headers=out)
+        return Response(self.body, media_type=self.media_type, headers=out)
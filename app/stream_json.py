@@ -0,0 +1,165 @@
+"""
+🌊 Incremental JSON object parser for streamed model output
+✅ Consumes text chunks as tokens arrive; each character is scanned once
+✅ Emits (path, value) as soon as a field's value is closed: ("objective",), ("objective", "vitals")
+✅ Skips chatter before the first "{" and ignores everything after the root object closes
+✅ `complete(required)` tells the caller it can stop generation early
+"""
+
+import json
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+_WS = " \t\r\n"
+
+Path = Tuple[str, ...]
+
+
+class StreamParseError(ValueError):
+    pass
+
+
+class _Frame:
+    __slots__ = ("kind", "path", "start", "key", "expect")
+
+    def __init__(self, kind: str, path: Path, start: int):
+        self.kind = kind  # "{" or "["
+        self.path = path
+        self.start = start
+        self.key: Optional[str] = None
+        self.expect = "key" if kind == "{" else "value"
+
+
+class StreamingJSONObject:
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self.text = ""
+        self.top: Dict[str, Any] = {}  # closed top-level fields
+        self.done = False
+        self.start = self.end = 0  # text[start:end] is the root object once done
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._token_start = 0  # start of the current string / scalar
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        """New (path, value) pairs completed by this chunk."""
+        if self.done:
+            return []
+        self.text += chunk
+        emitted: List[Tuple[Path, Any]] = []
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self.done:
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._string_closed(i, emitted)
+                i += 1
+                continue
+            if not self._stack:
+                if c == "{":
+                    self._stack.append(_Frame("{", (), i))
+                i += 1  # chatter before the object
+                continue
+            frame = self._stack[-1]
+            if frame.expect == "scalar":
+                if c in _WS or c in ",}]":
+                    self._complete(self._token_start, i, emitted)
+                    frame.expect = "comma"
+                else:
+                    i += 1
+                    continue
+            if c in _WS:
+                i += 1
+                continue
+            if frame.expect == "key":
+                if c == '"':
+                    self._in_string, self._token_start = True, i
+                elif c == "}" and frame.key is None:
+                    self._close(i, emitted)
+                else:
+                    raise StreamParseError(f"expected key at offset {i}")
+            elif frame.expect == "colon":
+                if c != ":":
+                    raise StreamParseError(f"expected ':' at offset {i}")
+                frame.expect = "value"
+            elif frame.expect == "value":
+                if c in "{[":
+                    frame.expect = "comma"
+                    self._stack.append(_Frame(c, self._child_path(frame), i))
+                elif c == '"':
+                    self._in_string, self._token_start = True, i
+                elif c == "]" and frame.kind == "[" and text[frame.start + 1:i].strip() == "":
+                    self._close(i, emitted)
+                elif c in ",:}]":
+                    raise StreamParseError(f"expected value at offset {i}")
+                else:
+                    frame.expect, self._token_start = "scalar", i
+            elif frame.expect == "comma":
+                if c == ",":
+                    frame.expect = "key" if frame.kind == "{" else "value"
+                elif c == ("}" if frame.kind == "{" else "]"):
+                    self._close(i, emitted)
+                else:
+                    raise StreamParseError(f"expected ',' or close at offset {i}")
+            i += 1
+        self._pos = i
+        return emitted
+
+    def complete(self, required: Collection[str] = ()) -> bool:
+        """The root object closed, or every required top-level field has."""
+        return self.done or (bool(required) and all(key in self.top for key in required))
+
+    def value(self) -> Dict[str, Any]:
+        """The whole object once done, else the top-level fields closed so far."""
+        if self.done:
+            return json.loads(self.text[self.start:self.end])
+        return dict(self.top)
+
+    def _child_path(self, frame: _Frame) -> Path:
+        return frame.path if frame.kind == "[" else frame.path + (frame.key,)
+
+    def _string_closed(self, end: int, emitted: List[Tuple[Path, Any]]) -> None:
+        frame = self._stack[-1]
+        if frame.expect == "key":
+            frame.key = json.loads(self.text[self._token_start:end + 1])
+            frame.expect = "colon"
+        else:
+            self._complete(self._token_start, end + 1, emitted)
+            frame.expect = "comma"
+
+    def _close(self, end: int, emitted: List[Tuple[Path, Any]]) -> None:
+        frame = self._stack.pop()
+        if not self._stack:
+            self.done, self.start, self.end = True, frame.start, end + 1
+            return
+        self._complete(frame.start, end + 1, emitted)
+
+    def _complete(self, start: int, end: int, emitted: List[Tuple[Path, Any]]) -> None:
+        """A value in the innermost open container ended at text[start:end]."""
+        parent = self._stack[-1]
+        if parent.kind != "{" or len(self._stack) > self.max_depth:
+            return
+        path = self._child_path(parent)
+        try:
+            value = json.loads(self.text[start:end])
+        except ValueError as e:
+            raise StreamParseError(f"bad value for {path!r}: {e}") from e
+        if len(path) == 1:
+            self.top[path[0]] = value
+        emitted.append((path, value))
+
+
+def first_json_object(text: str) -> Dict[str, Any]:
+    """The first JSON object in `text`, ignoring chatter around it."""
+    parser = StreamingJSONObject(max_depth=1)
+    parser.feed(text)
+    if not parser.done:
+        raise StreamParseError("no complete JSON object")
+    return parser.value()
@@ -0,0 +1,39 @@
+"""
+🔥 Startup warmup + self-benchmark
+✅ Runs a small built-in corpus through parse -> extract -> encode
+✅ Exercises every rule pattern plus the jiter and encoder paths
+✅ Records per-note timing so a slow instance is visible before traffic hits it
+"""
+
+import json
+import time
+from typing import Any, Dict
+
+from fastparse import parse_transcript
+from soap_encoder import encode_soap
+from soap_generator import SOAPGenerator
+
+WARMUP_CORPUS = (
+    "Patient 52M chest pain 7/10 x4hrs BP 168/98 HR 112 troponin 2.1. Diaphoretic, ST elevation V2-V4.",
+    "Routine checkup. HbA1c 7.8, cholesterol elevated, glucose 126. Blood pressure 128/82, pulse 74.",
+    "Fever and productive cough for 3 days with sputum. WBC 14.2, consolidation right lower lobe.",
+    "Known seizure disorder, breakthrough seizure this morning. Exam within normal limits, BG 98.",
+)
+
+
+def run_warmup(generator: SOAPGenerator, rounds: int = 25) -> Dict[str, Any]:
+    started = time.perf_counter()
+    bodies = [json.dumps({"transcript": t}).encode() for t in WARMUP_CORPUS]
+    notes = 0
+    bench_started = time.perf_counter()
+    for _ in range(rounds):
+        for body in bodies:
+            encode_soap(generator.generate(parse_transcript(body, "application/json")))
+            notes += 1
+    bench_seconds = time.perf_counter() - bench_started
+    return {
+        "samples": len(WARMUP_CORPUS),
+        "notes": notes,
+        "per_note_us": round(bench_seconds / notes * 1e6, 2),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -0,0 +1,85 @@
+"""
+⏱️ Benchmark: per-request framework overhead, raw ASGI fast route vs FastAPI stack
+Drives the ASGI app in-process (no sockets) so only the layers differ. The
+transcript is a result-cache hit, so generation itself costs ~nothing.
+
+    python scripts/bench_fast_route.py [requests]
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+TRANSCRIPT = "Patient 52M chest pain 7/10 x4hrs BP 168/98 HR 112 troponin 2.1. Diaphoretic."
+CASES = {
+    "POST /generate-soap": (
+        "POST", "/generate-soap",
+        [(b"content-type", b"application/json"), (b"origin", b"https://clinic.example")],
+        json.dumps({"transcript": TRANSCRIPT}).encode(),
+    ),
+    "OPTIONS preflight": (
+        "OPTIONS", "/generate-soap",
+        [(b"origin", b"https://clinic.example"), (b"access-control-request-method", b"POST"),
+         (b"access-control-request-headers", b"content-type")],
+        b"",
+    ),
+}
+
+
+async def _call(app, method, path, headers, body):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": headers + [(b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"]
+
+
+async def _measure(requests):
+    sys.path.insert(0, APP_DIR)
+    from app import app  # noqa: E402
+
+    results = {}
+    for name, case in CASES.items():
+        assert await _call(app, *case) == 200, name
+        best = float("inf")
+        for _ in range(5):
+            started = time.perf_counter()
+            for _ in range(requests):
+                await _call(app, *case)
+            best = min(best, time.perf_counter() - started)
+        results[name] = best / requests * 1e6
+    return results
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    if os.getenv("_BENCH_CHILD"):
+        print(json.dumps(asyncio.run(_measure(requests))))
+        return
+    runs = {}
+    for label, flag in (("FastAPI stack", "0"), ("fast route", "1")):
+        env = dict(os.environ, _BENCH_CHILD="1", SOAP_FAST_ROUTE=flag, SOAP_JOBS="0", SOAP_RATE_LIMIT="0")
+        out = subprocess.run([sys.executable, __file__, str(requests)], env=env, capture_output=True, text=True, check=True)
+        runs[label] = json.loads(out.stdout.splitlines()[-1])
+    for name in CASES:
+        slow, fast = runs["FastAPI stack"][name], runs["fast route"][name]
+        print(f"{name:24s} FastAPI stack {slow:8.1f} us/req   fast route {fast:8.1f} us/req   x{slow / fast:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+⏱️ Microbenchmark: SOAP note encode time per note
+Compares FastAPI's generic path (jsonable_encoder + json.dumps) against
+soap_encoder.encode_soap on notes produced by the rule engine.
+
+    python scripts/bench_soap_encoder.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from soap_encoder import encode_generic, encode_soap  # noqa: E402
+from soap_generator import SOAPGenerator  # noqa: E402
+
+TRANSCRIPTS = [
+    "Patient 52M chest pain 7/10 x4hrs BP 168/98 HR 112 troponin 2.1. Diaphoretic. ST elevation V2-V4.",
+    "Routine checkup. HbA1c 7.8, cholesterol elevated. Patient says \"feeling fine\" – no complaints.",
+    "Fever and productive cough for 3 days, WBC 14.2, consolidation right lower lobe. Pulse 104.",
+]
+
+
+def generic_path(note):
+    return encode_generic(jsonable_encoder(note))
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    gen = SOAPGenerator()
+    notes = [gen.generate(t) for t in TRANSCRIPTS]
+    for note in notes:
+        assert encode_soap(note) == generic_path(note), "encoders disagree"
+
+    for name, fn in (("jsonable_encoder+json.dumps", generic_path), ("encode_soap", encode_soap)):
+        best = min(timeit.repeat(lambda: [fn(n) for n in notes], number=iterations, repeat=5))
+        per_note_us = best / (iterations * len(notes)) * 1e6
+        print(f"{name:<28} {per_note_us:8.2f} µs/note")
+
+
+if __name__ == "__main__":
+    main()
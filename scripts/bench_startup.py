@@ -0,0 +1,70 @@
+"""
+⏱️ Startup benchmark: cold `import app` time in fresh interpreters
+Each run times a bare `import fastapi` and then `import app` in the same
+interpreter, so the app's own cost is measured apart from the framework's
+(which dominates the total and swings with disk cache and CPU noise).
+Reports best and median over N runs plus the slowest modules from
+`python -X importtime`, and fails if the app's own median is over budget.
+
+    python scripts/bench_startup.py [runs] [budget_ms]
+
+The budget defaults to SOAP_IMPORT_BUDGET_MS (250 ms, about 5x the
+app's own import on a laptop).
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+SNIPPET = (
+    "import time; t0 = time.perf_counter(); import fastapi; t1 = time.perf_counter(); import app; "
+    "print((t1 - t0) * 1000, (time.perf_counter() - t1) * 1000)"
+)
+
+
+def _run(args, cwd, env):
+    return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def slowest_modules(cwd, env, top=10):
+    """(self_us, cumulative_us, module) for the slowest direct imports."""
+    stderr = _run(["-X", "importtime", "-c", "import app"], cwd, env).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    rows.sort(key=lambda r: r[1], reverse=True)
+    return rows[:top]
+
+
+def main() -> int:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else float(os.getenv("SOAP_IMPORT_BUDGET_MS", "250"))
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=APP_DIR, SOAP_JOBS_DB=os.path.join(tmp, "jobs.db"))
+        samples = [[float(ms) for ms in _run(["-c", SNIPPET], tmp, env).stdout.split()[-2:]] for _ in range(runs)]
+        modules = slowest_modules(tmp, env)
+
+    baseline = [fastapi_ms for fastapi_ms, _ in samples]
+    own = [app_ms for _, app_ms in samples]
+    totals = [fastapi_ms + app_ms for fastapi_ms, app_ms in samples]
+    median = statistics.median(own)
+    print(f"import fastapi (baseline): best {min(baseline):.1f} ms, median {statistics.median(baseline):.1f} ms")
+    print(f"import app on top of it:   best {min(own):.1f} ms, median {median:.1f} ms (budget {budget_ms:.0f} ms)")
+    print(f"total: median {statistics.median(totals):.1f} ms over {runs} runs")
+    print(f"{'self ms':>9} {'total ms':>9}  module")
+    for self_us, cumulative_us, name in modules:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+    if median > budget_ms:
+        print("FAIL: app import time over budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+🧪 Local stub model server (Ollama + OpenAI-compatible) for exercising the model backend
+Answers /api/generate, /v1/chat/completions and batched /v1/completions with a canned SOAP note (or,
+for hybrid "Fill:" prompts, just the requested fields) after an optional delay, keeps connections alive, and reports what it saw on GET /stats.
+With "stream": true it sends 4-character tokens (NDJSON for Ollama, SSE for
+OpenAI) followed by some chatter, so early stopping is visible.
+Like a real runner it keeps the previous prompt and only "evaluates" the part
+after the longest shared prefix, reporting it as Ollama prompt_eval_* / OpenAI usage.
+--malformed-rate sends a share of answers with the defects small models produce
+(trailing commas, a string where a list belongs, a missing key).
+
+    python scripts/model_stub.py [--port 11434] [--delay 0.2] [--fail-rate 0.0]
+    SOAP_MODEL_BACKEND=ollama SOAP_MODEL_URL=http://127.0.0.1:11434 uvicorn app:app --app-dir app
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NOTE = {
+    "subjective": {"chief_complaint": "Chest pain", "hpi": "Stub model note"},
+    "objective": {"vitals": "BP 150/90", "exam": "Diaphoretic", "labs": "Troponin 2.1"},
+    "assessment": ["Acute coronary syndrome"],
+    "plan": {"medications": ["Aspirin 325mg"], "labs": ["Serial troponins"], "follow_up": "Cardiology today"},
+    "visit_summary": "Chest pain - stub",
+}
+
+
+def answer(prompt: str) -> dict:
+    if "\nFill:\n" not in prompt:
+        return NOTE
+    wanted = json.loads(prompt.split("\nFill:\n", 1)[1].split("\n", 1)[0])
+    return {path: [f"stub {path}"] if kind == "[str]" else f"stub {path}" for path, kind in wanted.items()}
+
+
+def common_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def malform(note: dict) -> str:
+    note = json.loads(json.dumps(note))
+    for key, value in list(note.items()):
+        if isinstance(value, list):
+            note[key] = value[0] if value else ""  # string instead of list
+        elif isinstance(value, dict) and len(value) > 1:
+            value.pop(next(iter(value)))  # missing key
+    return json.dumps(note).replace("}", ",}")  # trailing commas
+
+
+CHATTER = "\n\nLet me know if you would like the note in another format or with more detail."
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.batched_prompts = 0
+        self.tokens_sent = 0
+        self.streams_cut = 0
+        self.last_prompt = ""
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client-side pooling is visible
+    stats = Stats()
+    delay = 0.0
+    fail_rate = 0.0
+    token_delay = 0.0
+    malformed_rate = 0.0
+
+    def setup(self):
+        super().setup()
+        with self.stats.lock:
+            self.stats.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        s = self.stats
+        self._reply(200, {
+            "connections": s.connections, "requests": s.requests,
+            "max_active": s.max_active, "batched_prompts": s.batched_prompts,
+            "tokens_sent": s.tokens_sent, "streams_cut": s.streams_cut,
+            "prompt_tokens": s.prompt_tokens, "cached_tokens": s.cached_tokens,
+        })
+
+    def _evaluate(self, request: dict) -> dict:
+        """Prompt-eval accounting against the previous prompt (4 chars per token)."""
+        if "messages" in request:
+            full = "".join(m.get("content", "") for m in request["messages"])
+        else:
+            full = request.get("system", "") + request.get("prompt", "")
+        with self.stats.lock:
+            cached = common_prefix(full, self.stats.last_prompt) // 4
+            self.stats.last_prompt = full
+            total = len(full) // 4
+            self.stats.prompt_tokens += total
+            self.stats.cached_tokens += cached
+        evaluated = total - cached
+        return {
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": evaluated * 200_000,  # 0.2 ms per token, in ns
+            "usage": {"prompt_tokens": total, "prompt_tokens_details": {"cached_tokens": cached}},
+        }
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        s = self.stats
+        with s.lock:
+            s.requests += 1
+            s.active += 1
+            s.max_active = max(s.max_active, s.active)
+        try:
+            time.sleep(self.delay)
+            if random.random() < self.fail_rate:
+                self._reply(500, {"error": "stub failure"})
+                return
+            if self.path == "/v1/completions":  # list of prompts: one delay for the whole batch
+                prompts = request["prompt"] if isinstance(request["prompt"], list) else [request["prompt"]]
+                choices = [{"index": i, "text": json.dumps(answer(p))} for i, p in enumerate(prompts)]
+                with s.lock:
+                    s.batched_prompts += len(prompts)
+                self._reply(200, {"choices": choices})
+                return
+            prompt = request.get("prompt") or request.get("messages", [{}])[-1].get("content", "")
+            text = json.dumps(answer(prompt))
+            if random.random() < self.malformed_rate:
+                text = malform(answer(prompt))
+            usage = self._evaluate(request)
+            ollama_usage = {k: usage[k] for k in ("prompt_eval_count", "prompt_eval_duration")}
+            if request.get("stream") and self.path in ("/api/generate", "/v1/chat/completions"):
+                self._stream(text + CHATTER, ollama_usage if self.path == "/api/generate" else usage["usage"])
+            elif self.path == "/api/generate":
+                self._reply(200, {"model": request.get("model"), "response": text, "done": True, **ollama_usage})
+            elif self.path == "/v1/chat/completions":
+                self._reply(200, {
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}}],
+                    "usage": usage["usage"],
+                })
+            else:
+                self._reply(404, {"error": f"unknown path {self.path}"})
+        finally:
+            with s.lock:
+                s.active -= 1
+
+
+    def _stream(self, text: str, usage: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson" if self.path == "/api/generate" else "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        tokens = [text[i:i + 4] for i in range(0, len(text), 4)]
+        if self.path == "/api/generate":
+            lines = [json.dumps({"response": t, "done": False}) + "\n" for t in tokens]
+            lines.append(json.dumps({"response": "", "done": True, **usage}) + "\n")
+        else:
+            lines = ["data: " + json.dumps({"choices": [{"delta": {"content": t}, "finish_reason": None}]}) + "\n\n"
+                     for t in tokens]
+            lines.append("data: " + json.dumps({"choices": [{"delta": {}, "finish_reason": "stop"}], "usage": usage}) + "\n\n")
+            lines.append("data: [DONE]\n\n")
+        try:
+            for line in lines:
+                time.sleep(self.token_delay)
+                data = line.encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+                with self.stats.lock:
+                    self.stats.tokens_sent += 1
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            with self.stats.lock:
+                self.stats.streams_cut += 1  # the client stopped reading: generation ends here
+            self.close_connection = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--delay", type=float, default=0.2, help="seconds per response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of defective JSON answers")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="seconds per streamed token")
+    args = parser.parse_args()
+    StubHandler.token_delay = args.token_delay
+    StubHandler.delay = args.delay
+    StubHandler.fail_rate = args.fail_rate
+    StubHandler.malformed_rate = args.malformed_rate
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"stub model server on http://{args.host}:{args.port} (delay {args.delay}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The service's modules import each other by bare name, as under `uvicorn --app-dir app`
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
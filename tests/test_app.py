@@ -0,0 +1,42 @@
+import os
+
+os.environ.setdefault("SOAP_JOBS", "0")  # no worker pool or jobs.db for these tests
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as service
+
+TRANSCRIPT = "Patient reports a dry cough for three days. Temperature 38.1 C. No chest pain."
+
+
+@pytest.fixture
+def client():
+    with TestClient(service.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("path", ["/generate-soap", "/generate-soap/validated"])
+def test_wildcard_if_none_match_still_renders(client, path):
+    response = client.post(path, json={"transcript": TRANSCRIPT}, headers={"If-None-Match": "*"})
+    assert response.status_code == 200
+    assert response.json()["subjective"]
+
+
+def test_concrete_etag_revalidates(client):
+    first = client.post("/generate-soap", json={"transcript": TRANSCRIPT})
+    again = client.post("/generate-soap", json={"transcript": TRANSCRIPT}, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+@pytest.mark.parametrize("path", ["/generate-soap", "/generate-soap/validated"])
+def test_refused_bodies_are_not_rate_limited(client, path):
+    oversize = b'{"transcript": "' + b"x" * 70_000 + b'"}'
+    for _ in range(3):  # one full-burst charge each would have meant 429s from the second on
+        response = client.post(path, content=oversize, headers={"Content-Type": "application/json"})
+        assert response.status_code == 413
+    response = client.post(path, content=b"<transcript/>", headers={"Content-Type": "application/xml"})
+    assert response.status_code == 415
+    assert service.rate_limiter.stats()["limited"] == 0
+    assert client.post(path, json={"transcript": TRANSCRIPT}).status_code == 200
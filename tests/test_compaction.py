@@ -0,0 +1,30 @@
+import time
+
+from compaction import TranscriptCompactor, collapse_repeats
+
+
+def test_repeated_words_and_phrases_collapse():
+    assert collapse_repeats("I I I think it hurts it hurts, it hurts a lot.") == "I think it hurts a lot."
+    assert collapse_repeats("the pain the pain is bad") == "the pain is bad"
+
+
+def test_repeats_across_sentences_and_partial_words_stay():
+    assert collapse_repeats("No. No. never") == "No. No. never"
+    assert collapse_repeats("it hurts it hurtsss") == "it hurts it hurtsss"
+    assert collapse_repeats("5 mm 5 mm") == "5 mm 5 mm"
+
+
+def test_repeated_answers_and_units_survive_compaction():
+    text = TranscriptCompactor().compact(
+        "Doctor: Any chest pain?\nPatient: Yes.\nDoctor: Any shortness of breath?\nPatient: Yes.\n"
+        "Doctor: The lesion is 5 mm, BP 120/80 mm Hg."
+    ).text
+    assert text.count("Patient: Yes.") == 2
+    assert "5 mm" in text and "mm Hg" in text
+
+
+def test_pathological_runs_compact_in_linear_time():
+    for transcript in ("a'" * 5000, "aaa'" * 2500, "it hurts " * 2000):
+        started = time.perf_counter()
+        TranscriptCompactor().compact(transcript)
+        assert time.perf_counter() - started < 0.5
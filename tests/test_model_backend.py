@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from model_backend import ModelError, OllamaBackend, OpenAIBackend
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _sse(*events):
+    return "".join(f"data: {json.dumps(event)}\n\n" for event in events).encode()
+
+
+async def _complete(backend, **kwargs):
+    try:
+        return await backend.complete("Transcript:\nchest pain", "system", **kwargs)
+    finally:
+        await backend.aclose()
+
+
+def test_streamed_error_event_is_a_model_error():
+    def handler(request):
+        body = _sse({"error": {"message": "model overloaded", "code": 503}})
+        return httpx.Response(200, content=body, headers={"content-type": "text/event-stream"})
+
+    backend = OpenAIBackend("http://model", "m", stream=True, transport=httpx.MockTransport(handler))
+    with pytest.raises(ModelError, match="model overloaded"):
+        _run(_complete(backend))
+
+
+def test_streamed_chunk_without_choices_is_a_model_error():
+    def handler(request):
+        body = _sse({"id": "x", "object": "chat.completion.chunk"})
+        return httpx.Response(200, content=body, headers={"content-type": "text/event-stream"})
+
+    backend = OpenAIBackend("http://model", "m", stream=True, transport=httpx.MockTransport(handler))
+    with pytest.raises(ModelError):
+        _run(_complete(backend))
+    assert backend.errors == 1
+
+
+def test_non_object_body_is_a_model_error():
+    def handler(request):
+        return httpx.Response(200, json=["not", "an", "object"])
+
+    backend = OllamaBackend("http://model", "m", transport=httpx.MockTransport(handler))
+    with pytest.raises(ModelError):
+        _run(_complete(backend))
+
+
+def test_streamed_answer_is_returned():
+    def handler(request):
+        body = _sse(
+            {"choices": [{"delta": {"content": '{"assessment": '}, "finish_reason": None}]},
+            {"choices": [{"delta": {"content": '["Chest pain"]}'}, "finish_reason": "stop"}]},
+        )
+        return httpx.Response(200, content=body + b"data: [DONE]\n\n", headers={"content-type": "text/event-stream"})
+
+    backend = OpenAIBackend("http://model", "m", stream=True, transport=httpx.MockTransport(handler))
+    assert json.loads(_run(_complete(backend))) == {"assessment": ["Chest pain"]}
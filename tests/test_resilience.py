@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from model_backend import ModelError
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def _call(breaker, error=None):
+    async with breaker.call():
+        if error is not None:
+            raise error
+
+
+def _open_breaker(clock):
+    breaker = CircuitBreaker(window=4, min_calls=2, failure_rate=0.5, open_seconds=10, clock=clock)
+    for _ in range(2):
+        with pytest.raises(ModelError):
+            asyncio.run(_call(breaker, ModelError("down")))
+    assert breaker.state == OPEN
+    return breaker
+
+
+def test_unexpected_error_in_half_open_probe_reopens_instead_of_wedging():
+    clock = Clock()
+    breaker = _open_breaker(clock)
+    clock.now += 10
+    with pytest.raises(KeyError):
+        asyncio.run(_call(breaker, KeyError("choices")))
+    assert breaker.state == OPEN
+    clock.now += 10
+    asyncio.run(_call(breaker))
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_probe_lets_another_probe_through():
+    clock = Clock()
+    breaker = _open_breaker(clock)
+    clock.now += 10
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(_call(breaker, asyncio.CancelledError()))
+    assert breaker.state == HALF_OPEN
+    asyncio.run(_call(breaker))
+    assert breaker.state == CLOSED
+
+
+def test_open_breaker_fails_fast():
+    breaker = _open_breaker(Clock())
+    with pytest.raises(CircuitOpen):
+        asyncio.run(_call(breaker))